@@ -1,36 +1,19 @@
-import os
 from http.client import HTTPException
 from time import time
 
-import boto3
-import stripe
 from typing_extensions import Annotated
 from aws_lambda_powertools import Logger, Tracer, Metrics
 from aws_lambda_powertools.event_handler import BedrockAgentResolver
 from aws_lambda_powertools.utilities.typing import LambdaContext
 from aws_lambda_powertools.event_handler.openapi.params import Body, Query
-from utilities.utils import get_stripe_key, parse_raw_items
+from grocery_shared.secrets_cache import secrets_cache
+from utilities.checkout import create_payment_link, get_stripe, resolve_line_items
+from utilities.utils import parse_raw_items
 
 tracer = Tracer()
 logger = Logger()
 app = BedrockAgentResolver()
-dynamodb = boto3.resource("dynamodb")
-
-
-table_name = os.environ.get("ECOMMERCE_TABLE_NAME")
-
-
-table = dynamodb.Table(table_name)
-# Set your Stripe API key
-
-
 metrics = Metrics(namespace="grocery_agent_metrics")
-stripe_key = get_stripe_key()
-if stripe_key is None:
-    logger.info("Stripe API key not set")
-    raise HTTPException()
-# set stripe key
-stripe.api_key = stripe_key
 
 
 @tracer.capture_method
@@ -63,70 +46,39 @@ def payment_link(
             str: The payment link URL.
         """
     try:
-        line_items = []
+        stripe = get_stripe()
+    except ValueError:
+        raise HTTPException()
+    try:
         logger.info("we're here")
         print("products", products)
-        parsed_items = parse_raw_items(products)
-        print("parsed_items:", parsed_items.products[0].name)
-        logger.info(parsed_items.products[0].name)
-        # Iterate through the list of products
-        for product_info in parsed_items.products:
-            logger.info(f"Product info {product_info.name}")
-            product_name = product_info.name
-            qty = product_info.quantity
-
-            if not product_name or not qty:
-                logger.error("Invalid product info:", product_info)
-                raise HTTPException()
-
-            logger.info(f"Processing product: {product_name}, Quantity:{qty} ")
-
-            # Step 1: Retrieve the product by name
-            products_list = stripe.Product.list(limit=100)
-
-            product = None
-
-            # Filter products by name
-            for p in products_list.auto_paging_iter():
-                if p.name.lower() == product_name.lower():
-                    product = p
-                    break
-
-            if not product:
-                logger.error(f"No product found with name: {product_name}")
-                raise HTTPException()
-
-            logger.info(f"Product found! ID: {product.id}")
-
-            # Step 2: Retrieve the price for the product
-            prices = stripe.Price.list(
-                product=product.id, limit=1
-            )  # Get the first price
-            if not prices.data:
-                logger.error("No price found for product ID:", product.id)
-                raise HTTPException()
-
-            price = prices.data[0]  # Get the first price in the list
-            logger.debug(
-                f"Price found! ID: {price.id}, Amount: {price.unit_amount / 100} {price.currency.upper()}"
-            )
-            logger.info(f"line_items 1:{line_items}")
-            # Add the product to the line items
-            line_items.append(
-                {
-                    "price": price.id,
-                    "quantity": qty,
-                }
-            )
+        # Validate the parsed items before touching the catalog
+        try:
+            parsed_items = parse_raw_items(products).products
+        except ValueError as e:
+            logger.error(f"Invalid products {products}: {e}")
+            raise HTTPException()
+        print("parsed_items:", parsed_items[0].name)
+        logger.info(parsed_items[0].name)
+
+        # Step 1: Resolve every product name to its Stripe price in one pass
+        line_items, missing = resolve_line_items(parsed_items)
+        if missing:
+            logger.error(f"No product found with name(s): {missing}")
+            raise HTTPException()
         logger.debug(f"line_items 2: {line_items}")
 
-        # Step 3: Create a payment link with all line items
-        payment_link = stripe.PaymentLink.create(
-            line_items=line_items,
-        )
-        logger.info(f"Payment Link URL: {payment_link.url}")
-        return f"Payment Link URL: {payment_link.url}"
+        # Step 2: Create a payment link with all line items, unless the same
+        # cart already got one
+        payment_link_url = create_payment_link(line_items)
+        logger.info(f"Payment Link URL: {payment_link_url}")
+        return f"Payment Link URL: {payment_link_url}"
 
+    except stripe.error.AuthenticationError as e:
+        # The key may have been rotated since it was cached
+        logger.error("Stripe authentication failed: ", {e.user_message})
+        secrets_cache.invalidate()
+        raise HTTPException()
     except stripe.error.StripeError as e:
         logger.error("Stripe Error: ", {e.user_message})
         raise HTTPException()
@@ -146,7 +98,9 @@ def current_time() -> int:
 @tracer.capture_lambda_handler
 @metrics.log_metrics(capture_cold_start_metric=True)
 def lambda_handler(event: dict, context: LambdaContext):
-    return app.resolve(event, context)
+    response = app.resolve(event, context)
+    logger.debug("Secrets cache stats", extra=secrets_cache.stats)
+    return response
 
 
 if __name__ == "__main__":
@@ -1,9 +1,15 @@
 import json
 import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
 import boto3
 from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.utilities.data_classes.appsync import scalar_types_utils
+from grocery_shared.claim_check import claim_check
+from utilities.checkout import create_payment_link, resolve_line_items
+from utilities.grocery_list_parser import parse_grocery_list
 
 # Initialize Clients
 bedrock_agent_runtime_client = boto3.client(
@@ -20,6 +26,115 @@ table_name = os.environ.get("ECOMMERCE_TABLE_NAME")
 
 table = dynamodb.Table(table_name)
 
+# Create the payment link without the agent when the list parses cleanly
+FAST_PATH = os.environ.get("FAST_PATH", "true").lower() == "true"
+# Forward completion chunks to AppSync subscribers as they arrive
+STREAM_COMPLETION = os.environ.get("STREAM_COMPLETION", "false").lower() == "true"
+# Share of invocations that collect the agent trace (0 to 1)
+AGENT_TRACE_SAMPLE_RATE = float(os.environ.get("AGENT_TRACE_SAMPLE_RATE", "0.1"))
+
+publisher = None
+if STREAM_COMPLETION:
+    from utilities.appsync_publisher import APPSYNC_API_URL, AppSyncPublisher
+
+    publisher = AppSyncPublisher(APPSYNC_API_URL)
+    # a single worker keeps the chunks in order without blocking the stream
+    publish_executor = ThreadPoolExecutor(max_workers=1)
+
+
+def publish_chunk(session_id: str, account: str, sequence: int, chunk: str):
+    try:
+        publisher.publish(
+            detail_type="payment-link-progress",
+            event_id=f"{session_id}#{sequence}",
+            account=account,
+            data={"session_id": session_id, "sequence": sequence, "chunk": chunk},
+        )
+    except Exception as e:
+        # progress updates are best effort, the final record is what counts
+        logger.warning(f"Failed to publish chunk {sequence}: {e}")
+
+
+def create_payment_link_directly(grocery_list: str) -> Optional[str]:
+    """
+    Fast path: parse the list and resolve every item locally, then create the
+    payment link without the agent.
+
+    Returns:
+        The completion text, or None when the list is ambiguous or an item
+        doesn't resolve exactly, in which case the agent should handle it.
+    """
+    items = parse_grocery_list(grocery_list)
+    if items is None:
+        logger.info("Grocery list is not cleanly structured, using the agent")
+        return None
+    try:
+        line_items, missing = resolve_line_items(items, fuzzy=False)
+        if missing:
+            logger.info(f"Unresolved products {missing}, using the agent")
+            return None
+        return f"Payment Link URL: {create_payment_link(line_items)}"
+    except Exception as e:
+        logger.warning(f"Fast path failed, using the agent: {e}")
+        return None
+
+
+def invoke_grocery_agent(grocery_list: str, session_id: str, account: str) -> str:
+    """
+    Ask the Bedrock agent to create the payment link and return its completion.
+    """
+    # Create query string
+    query = f"Create and return a single Stripe payment link with the list of products: {grocery_list}"
+
+    # Invoke the Bedrock Agent, collecting the trace for a sample only
+    enable_trace = random.random() < AGENT_TRACE_SAMPLE_RATE
+    kwargs = {}
+    if publisher is not None:
+        # Without it the final response arrives as one chunk at the end of
+        # the run; the agent's role needs bedrock:InvokeModelWithResponseStream
+        kwargs["streamingConfigurations"] = {"streamFinalResponse": True}
+    agent_response = bedrock_agent_runtime_client.invoke_agent(
+        inputText=query,
+        agentId=agent_id,
+        agentAliasId="06J3ZLS1C3",
+        sessionId=session_id,
+        enableTrace=enable_trace,
+        **kwargs,
+    )
+
+    # Ensure the response contains the event stream
+    if "completion" not in agent_response:
+        raise Exception("Agent response is missing `completion` field.")
+
+    event_stream = agent_response["completion"]
+
+    # Collect all chunks from the stream, forwarding each one as it arrives
+    chunks = []
+    publishes = []
+    for event in event_stream:
+        chunk = event.get("chunk")
+        if chunk:
+            decoded_bytes = chunk.get("bytes").decode()
+            logger.debug(f"bytes: {decoded_bytes}")
+            if publisher is not None:
+                publishes.append(
+                    publish_executor.submit(
+                        publish_chunk,
+                        session_id,
+                        account,
+                        len(chunks),
+                        decoded_bytes,
+                    )
+                )
+            chunks.append(decoded_bytes)
+        elif enable_trace and "trace" in event:
+            logger.info("Agent trace", extra={"trace": event["trace"]})
+    completion = " ".join(chunks)
+    # don't let the container freeze with progress updates still queued
+    for publish in publishes:
+        publish.result()
+    return completion
+
 
 @logger.inject_lambda_context
 @tracer.capture_lambda_handler
@@ -27,8 +142,8 @@ def handler(event, context):
     try:
         logger.info(f"Received event: {json.dumps(event, indent=2)}")
 
-        # Parse the event body
-        grocery_list = event["grocery_list"]
+        # Parse the event body, reading large lists from S3
+        grocery_list = claim_check.resolve(event, "grocery_list")
         logger.info(f"Received event body: {grocery_list}")
 
         # Extract grocery_list and validate
@@ -36,36 +151,17 @@ def handler(event, context):
         if not grocery_list:
             raise ValueError("Error: `grocery_list` is missing or empty.")
 
-        # Create query string
-        query = f"Create and return a single Stripe payment link with the list of products: {grocery_list}"
-
         # Generate a unique session ID
         session_id = scalar_types_utils.make_id()
-
-        # Invoke the Bedrock Agent
-        agent_response = bedrock_agent_runtime_client.invoke_agent(
-            inputText=query,
-            agentId=agent_id,
-            agentAliasId="06J3ZLS1C3",
-            sessionId=session_id,
-            enableTrace=True,
-        )
-
-        # Ensure the response contains the event stream
-        if "completion" not in agent_response:
-            raise Exception("Agent response is missing `completion` field.")
-
-        event_stream = agent_response["completion"]
-
-        # Collect all chunks from the stream
-        chunks = []
-        for event in event_stream:
-            chunk = event.get("chunk")
-            if chunk:
-                decoded_bytes = chunk.get("bytes").decode()
-                print("bytes: ", decoded_bytes)
-                chunks.append(decoded_bytes)
-        completion = " ".join(chunks)
+        account = context.invoked_function_arn.split(":")[4]
+
+        # Cleanly parsed lists of known products skip the agent entirely
+        completion = create_payment_link_directly(grocery_list) if FAST_PATH else None
+        if completion is not None:
+            if publisher is not None:
+                publish_chunk(session_id, account, 0, completion)
+        else:
+            completion = invoke_grocery_agent(grocery_list, session_id, account)
 
         print(f"Completion: {completion}")
 
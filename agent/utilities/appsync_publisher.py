@@ -0,0 +1,92 @@
+import json
+import os
+from datetime import datetime, timezone
+from typing import Optional
+
+import boto3
+import urllib3
+from botocore.auth import SigV4Auth
+from botocore.awsrequest import AWSRequest
+
+APPSYNC_API_URL = os.environ.get("APPSYNC_API_URL")
+
+PUBLISH_MUTATION = """
+mutation Publish($data:String!,$detailType:String!,$id:String!,$source:String!,$account:String!,$time:String!,$region:String!) {
+  publish(data:$data,detailType:$detailType,id:$id,source:$source,account:$account,time:$time,region:$region) {
+    data detailType id source account time region
+  }
+}
+"""
+
+
+class AppSyncPublishError(Exception):
+    """
+    The publish mutation failed: an HTTP error status, or GraphQL errors.
+    """
+
+
+class AppSyncPublisher:
+    """
+    Calls the AppSync `publish` mutation with IAM (SigV4) auth, the same
+    mutation EventBridge uses, so `subscribe` clients receive the events.
+
+    One pooled keep-alive connection is reused for every call.
+    """
+
+    def __init__(self, api_url: str, source: str = "grocery.app"):
+        self._api_url = api_url
+        self._source = source
+        self._region = os.environ.get("AWS_REGION", "us-east-1")
+        self._credentials = boto3.Session().get_credentials()
+        self._http = urllib3.PoolManager(
+            maxsize=1, retries=False, timeout=urllib3.Timeout(connect=2, read=5)
+        )
+
+    def publish(
+        self, detail_type: str, event_id: str, data: dict, account: str = ""
+    ) -> Optional[dict]:
+        """
+        Publish an event to the `subscribe` clients.
+
+        Returns:
+            The response body, if any.
+
+        Raises:
+            AppSyncPublishError: When AppSync rejects the mutation. AppSync
+            reports GraphQL errors, e.g. an invalid mapping template, with
+            a 200 status.
+        """
+        body = json.dumps(
+            {
+                "query": PUBLISH_MUTATION,
+                "variables": {
+                    "data": json.dumps(data),
+                    "detailType": detail_type,
+                    "id": event_id,
+                    "source": self._source,
+                    "account": account,
+                    "time": datetime.now(timezone.utc).isoformat(),
+                    "region": self._region,
+                },
+            }
+        )
+        request = AWSRequest(
+            method="POST",
+            url=self._api_url,
+            data=body,
+            headers={"Content-Type": "application/json"},
+        )
+        SigV4Auth(
+            self._credentials.get_frozen_credentials(), "appsync", self._region
+        ).add_auth(request)
+        response = self._http.request(
+            "POST", self._api_url, body=body, headers=dict(request.headers)
+        )
+        if not 200 <= response.status < 300:
+            raise AppSyncPublishError(
+                f"HTTP {response.status}: {response.data.decode(errors='replace')}"
+            )
+        result = json.loads(response.data) if response.data else None
+        if result and result.get("errors"):
+            raise AppSyncPublishError(json.dumps(result["errors"]))
+        return result
@@ -0,0 +1,75 @@
+import os
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+
+from aws_lambda_powertools import Logger
+from botocore.exceptions import ClientError
+from grocery_shared.dynamodb import create_dynamodb_client
+from grocery_shared.product import normalize_product_name, product_name_key
+from utilities.concurrency import bounded_map
+from utilities.price_index import PriceEntry
+
+PRODUCT_NAME_INDEX = os.environ.get("PRODUCT_NAME_INDEX", "productName")
+CATALOG_LOOKUP_MAX_WORKERS = int(os.environ.get("CATALOG_LOOKUP_MAX_WORKERS", "10"))
+
+logger = Logger(child=True)
+
+
+@lru_cache(maxsize=None)
+def get_dynamodb_client():
+    return create_dynamodb_client(CATALOG_LOOKUP_MAX_WORKERS)
+
+
+def _query_price(table_name: str, name: str) -> Optional[Tuple[str, PriceEntry]]:
+    try:
+        response = get_dynamodb_client().query(
+            TableName=table_name,
+            IndexName=PRODUCT_NAME_INDEX,
+            KeyConditionExpression="GSI3PK = :pk",
+            ExpressionAttributeValues={":pk": {"S": product_name_key(name)}},
+            ProjectionExpression="stripeProductId, stripePriceId",
+            Limit=1,
+        )
+    except ClientError as e:
+        # Throttling, a missing grant or an index still being created: the
+        # name is left to the catalog reload
+        logger.warning(f"Failed to look up {name} in {PRODUCT_NAME_INDEX}: {e}")
+        return None
+    items = response.get("Items", [])
+    if not items:
+        return None
+    item = items[0]
+    return normalize_product_name(name), (
+        item["stripeProductId"]["S"],
+        item["stripePriceId"]["S"],
+    )
+
+
+def lookup_prices(table_name: str, names: Iterable[str]) -> Dict[str, PriceEntry]:
+    """
+    Resolve product names to their Stripe ids from the catalog records that
+    `create_stripe_products` stores in DynamoDB.
+
+    One point query per distinct name is issued against the `productName`
+    index, all in parallel, so the whole cart costs a single round trip.
+
+    Args:
+        table_name: The ecommerce table name.
+        names: Product names as received from the agent.
+
+    Returns:
+        dict: Normalized name -> (stripe product id, stripe price id) for every
+        name found. Names that are not in the table, or whose lookup failed,
+        are left out.
+    """
+    # de-duplicate on the normalized name, keeping the first spelling seen
+    distinct: Dict[str, str] = {}
+    for name in names:
+        distinct.setdefault(normalize_product_name(name), name)
+
+    results = bounded_map(
+        lambda name: _query_price(table_name, name),
+        distinct.values(),
+        CATALOG_LOOKUP_MAX_WORKERS,
+    )
+    return dict(result for result in results if result is not None)
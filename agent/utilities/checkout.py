@@ -0,0 +1,150 @@
+import os
+from typing import Iterable, List, Tuple
+
+from aws_lambda_powertools import Logger
+from grocery_shared.product import normalize_product_name
+from grocery_shared.secrets_cache import get_stripe_key
+from utilities.price_index import PriceIndex
+from utilities.utils import ParsedItem
+
+# boto3 and stripe are imported on first use: routes like /current_time don't
+# need them, and stripe alone accounts for most of the cold start import time.
+
+logger = Logger(child=True)
+
+table_name = os.environ.get("ECOMMERCE_TABLE_NAME")
+
+# "reload": names missing from DynamoDB trigger one full Stripe catalog reload
+# "concurrent": they are first looked up in Stripe one by one, in parallel
+STRIPE_RESOLUTION_MODE = os.environ.get("STRIPE_RESOLUTION_MODE", "reload")
+
+_table = None
+_stripe = None
+
+
+def get_table():
+    global _table
+    if _table is None:
+        import boto3
+
+        _table = boto3.resource("dynamodb").Table(table_name)
+    return _table
+
+
+def get_stripe():
+    """
+    Import stripe and configure the HTTP client on first use; later calls in
+    the same container reuse the configured module. The API key is read from
+    the shared secrets cache on every call so a rotated key is picked up.
+    """
+    global _stripe
+    if _stripe is None:
+        import stripe
+        from utilities.stripe_client import configure_stripe_http_client
+
+        # share one pooled keep-alive HTTP client across all Stripe calls
+        configure_stripe_http_client()
+        _stripe = stripe
+
+    stripe_key = get_stripe_key()
+    if not stripe_key:
+        logger.info("Stripe API key not set")
+        raise ValueError("Stripe API key not set")
+    # set stripe key
+    _stripe.api_key = stripe_key
+    return _stripe
+
+
+def load_catalog():
+    get_stripe()
+    from utilities.stripe_client import load_stripe_catalog
+
+    return load_stripe_catalog()
+
+
+def lookup_catalog(names):
+    from utilities.catalog_table import lookup_prices
+
+    found = lookup_prices(table_name, names)
+    if STRIPE_RESOLUTION_MODE == "concurrent":
+        remaining = [
+            name for name in names if normalize_product_name(name) not in found
+        ]
+        if remaining:
+            get_stripe()
+            from utilities.stripe_client import lookup_stripe_prices
+
+            found.update(lookup_stripe_prices(remaining))
+    return found
+
+
+# Resolve names from the catalog records in DynamoDB first and only reload the
+# catalog from Stripe for names the table doesn't know about
+price_index = PriceIndex(loader=load_catalog, lookup=lookup_catalog)
+
+
+def resolve_line_items(
+    items: Iterable[ParsedItem], fuzzy: bool = True
+) -> Tuple[List[dict], List[str]]:
+    """
+    Resolve parsed items to Stripe line items.
+
+    Args:
+        items: Items with a product name and quantity.
+        fuzzy: Also accept approximate name matches, e.g. plurals.
+
+    Returns:
+        The line items, in item order, and the names that didn't resolve.
+        Line items are only meaningful when no name is missing.
+    """
+    items = list(items)
+    resolved, missing = price_index.resolve(item.name for item in items)
+    if missing and fuzzy:
+        # Near-miss names, e.g. plurals or extra adjectives from the agent
+        matches, missing = price_index.match(missing)
+        for name, (catalog_name, score) in matches.items():
+            logger.info(f"Matched {name} to {catalog_name} (score {score:.2f})")
+            resolved[name] = price_index.get(catalog_name)
+    if missing:
+        return [], missing
+
+    line_items = []
+    for item in items:
+        product_id, price_id = resolved[normalize_product_name(item.name)]
+        logger.info(
+            f"Processing product: {item.name}, Quantity:{item.quantity}, "
+            f"Product ID: {product_id}, Price ID: {price_id}"
+        )
+        line_items.append({"price": price_id, "quantity": item.quantity})
+    return line_items, []
+
+
+def create_payment_link(line_items: List[dict]) -> str:
+    """
+    Create a Stripe payment link for the line items, unless the same cart
+    already got one that is still active.
+
+    Returns:
+        str: The payment link URL.
+    """
+    from utilities.payment_link_cache import get_or_create_payment_link
+
+    stripe = get_stripe()
+    return get_or_create_payment_link(
+        get_table(),
+        line_items,
+        lambda items: stripe.PaymentLink.create(line_items=items),
+        lambda link_id: payment_link_active(stripe, link_id),
+    )
+
+
+def payment_link_active(stripe, link_id: str) -> bool:
+    """
+    Tell whether a payment link can still take payments. A link that can't
+    be read counts as inactive, so a new one is created.
+    """
+    try:
+        return stripe.PaymentLink.retrieve(link_id).active
+    except stripe.StripeError as e:
+        logger.warning(f"Failed to retrieve payment link {link_id}: {e}")
+        return False
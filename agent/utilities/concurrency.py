@@ -0,0 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def bounded_map(
+    fn: Callable[[T], R], items: Iterable[T], max_in_flight: int
+) -> List[R]:
+    """
+    Apply `fn` to every item on a thread pool with at most `max_in_flight`
+    calls running at once, returning the results in input order.
+    """
+    items = list(items)
+    if len(items) <= 1 or max_in_flight <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(len(items), max_in_flight)) as executor:
+        return list(executor.map(fn, items))
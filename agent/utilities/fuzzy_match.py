@@ -0,0 +1,87 @@
+import re
+from collections import Counter, defaultdict
+from itertools import chain
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _singular(token: str) -> str:
+    # Just enough stemming to match plurals like "strawberries" or "peaches"
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 4 and token.endswith(("ches", "shes", "sses", "xes", "oes")):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def trigrams(name: str) -> FrozenSet[str]:
+    """
+    Trigrams of the singularized tokens of a name, padded the same way as
+    Postgres' pg_trgm so that word starts and ends weigh in the score.
+    """
+    grams = set()
+    for token in _TOKEN_RE.findall(name.lower()):
+        padded = f"  {_singular(token)} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+class FuzzyMatcher:
+    """
+    Trigram inverted index over catalog names.
+
+    Scoring only visits the posting lists of the query's trigrams, so a
+    lookup costs microseconds regardless of how many names share no
+    trigram with the query. The score is the Dice coefficient of the two
+    trigram sets, between 0 and 1.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        self._names: List[str] = []
+        self._sizes: List[int] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        for name in names:
+            grams = trigrams(name)
+            if not grams:
+                continue
+            index = len(self._names)
+            self._names.append(name)
+            self._sizes.append(len(grams))
+            for gram in grams:
+                self._postings[gram].append(index)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def best_match(self, query: str) -> Optional[Tuple[str, float]]:
+        """
+        Find the catalog name closest to `query`.
+
+        Returns:
+            The best matching name and its score, or None when no name
+            shares a trigram with the query.
+        """
+        grams = trigrams(query)
+        if not grams:
+            return None
+
+        # Count shared trigrams per candidate in one C-level pass over the
+        # posting lists of the query's trigrams
+        shared = Counter(
+            chain.from_iterable(self._postings.get(gram, ()) for gram in grams)
+        )
+        if not shared:
+            return None
+
+        size = len(grams)
+        index, score = max(
+            (
+                (index, 2 * count / (size + self._sizes[index]))
+                for index, count in shared.items()
+            ),
+            key=lambda candidate: candidate[1],
+        )
+        return self._names[index], score
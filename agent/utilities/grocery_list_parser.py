@@ -0,0 +1,45 @@
+from typing import List, Optional
+
+from grocery_shared.grocery_grammar import LIST_LINE_PATTERNS, strip_bullet
+from utilities.utils import ParsedItem
+
+
+def parse_grocery_line(line: str) -> Optional[ParsedItem]:
+    """
+    Parse one list line into an item, or None if it isn't a clean
+    name/quantity/unit line.
+    """
+    line = strip_bullet(line)
+    for pattern in LIST_LINE_PATTERNS:
+        match = pattern.match(line)
+        if match:
+            unit = match.groupdict().get("unit")
+            return ParsedItem(
+                " ".join(match.group("name").split()),
+                int(match.group("quantity")),
+                unit.lower() if unit else None,
+            )
+    return None
+
+
+def parse_grocery_list(text: str) -> Optional[List[ParsedItem]]:
+    """
+    Parse a grocery list deterministically, all or nothing.
+
+    Blank lines and headers ending with ":" are skipped. Any other line that
+    doesn't parse, e.g. a decimal quantity or free-form text, makes the list
+    ambiguous.
+
+    Returns:
+        The items in list order, or None when the list is ambiguous or empty.
+    """
+    items = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.endswith(":"):
+            continue
+        item = parse_grocery_line(line)
+        if item is None or item.quantity <= 0:
+            return None
+        items.append(item)
+    return items or None
@@ -0,0 +1,13 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class Item(BaseModel):
+    name: str = Field(min_length=1)
+    quantity: int = Field(gt=0)
+    unit: Optional[str] = None  # Make unit optional
+
+
+class ItemList(BaseModel):
+    products: List[Item] = Field(min_length=1)
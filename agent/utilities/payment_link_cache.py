@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+from typing import Callable, Dict, List, Optional
+
+from aws_lambda_powertools import Logger
+from botocore.exceptions import ClientError
+from grocery_shared.dynamodb import expires_at, unexpired
+
+PAYMENT_LINK_CACHE_TTL_SECONDS = int(
+    os.environ.get("PAYMENT_LINK_CACHE_TTL_SECONDS", "86400")
+)
+
+logger = Logger(child=True)
+
+
+def canonical_line_items(line_items: List[dict]) -> List[dict]:
+    """
+    Canonical form of a cart: one line per price id, quantities summed,
+    sorted by price id.
+    """
+    quantities: Dict[str, int] = {}
+    for line_item in line_items:
+        price = line_item["price"]
+        quantities[price] = quantities.get(price, 0) + int(line_item["quantity"])
+    return [
+        {"price": price, "quantity": quantity}
+        for price, quantity in sorted(quantities.items())
+    ]
+
+
+def cart_hash(line_items: List[dict]) -> str:
+    """
+    Stable hash of a cart, identical for carts that differ only in the order
+    or splitting of their line items.
+    """
+    canonical = json.dumps(canonical_line_items(line_items), separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def get_cached_payment_link(table, key: str) -> Optional[dict]:
+    """
+    Return the cached payment link of a cart, as {"paymentLinkId", "url"},
+    or None.
+    """
+    try:
+        response = table.get_item(Key={"PK": f"CART#{key}", "SK": "PAYMENTLINK"})
+    except ClientError as e:
+        logger.warning(f"Failed to read cached payment link: {e}")
+        return None
+    item = unexpired(response.get("Item"))
+    if item is None or "paymentLinkId" not in item:
+        return None
+    return item
+
+
+def cache_payment_link(table, key: str, payment_link) -> None:
+    try:
+        table.put_item(
+            Item={
+                "PK": f"CART#{key}",
+                "SK": "PAYMENTLINK",
+                "paymentLinkId": payment_link.id,
+                "url": payment_link.url,
+                "ttl": expires_at(PAYMENT_LINK_CACHE_TTL_SECONDS),
+            }
+        )
+    except ClientError as e:
+        logger.warning(f"Failed to cache payment link: {e}")
+
+
+def get_or_create_payment_link(
+    table,
+    line_items: List[dict],
+    create: Callable[[List[dict]], object],
+    is_active: Callable[[str], bool],
+) -> str:
+    """
+    Return the payment link URL for a cart, reusing the link created for an
+    identical cart within the cache TTL as long as it is still active, i.e.
+    wasn't deactivated in Stripe since.
+
+    Args:
+        table: The ecommerce DynamoDB table.
+        line_items: Stripe line items, as {"price": ..., "quantity": ...}.
+        create: Creates the Stripe payment link for the canonical line items.
+        is_active: Tells whether the payment link with this id is active.
+
+    Returns:
+        str: The payment link URL.
+    """
+    key = cart_hash(line_items)
+    cached = get_cached_payment_link(table, key)
+    if cached:
+        if is_active(cached["paymentLinkId"]):
+            logger.info(f"Reusing payment link for cart {key}")
+            return cached["url"]
+        logger.info(f"Cached payment link for cart {key} is no longer active")
+
+    payment_link = create(canonical_line_items(line_items))
+    cache_payment_link(table, key, payment_link)
+    return payment_link.url
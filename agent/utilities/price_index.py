@@ -0,0 +1,186 @@
+import os
+import threading
+from collections import OrderedDict
+from time import monotonic
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from grocery_shared.product import normalize_product_name
+from utilities.fuzzy_match import FuzzyMatcher
+
+# (stripe product id, stripe price id)
+PriceEntry = Tuple[str, str]
+
+PRICE_INDEX_TTL_SECONDS = int(os.environ.get("PRICE_INDEX_TTL_SECONDS", "300"))
+PRICE_INDEX_MAX_ENTRIES = int(os.environ.get("PRICE_INDEX_MAX_ENTRIES", "10000"))
+# Misses reload the whole catalog at most this often, so names that are not
+# in the catalog don't cost a full reload on every cart
+PRICE_INDEX_MIN_REFRESH_SECONDS = int(
+    os.environ.get("PRICE_INDEX_MIN_REFRESH_SECONDS", "60")
+)
+FUZZY_MATCH_MIN_SCORE = float(os.environ.get("FUZZY_MATCH_MIN_SCORE", "0.6"))
+
+
+class PriceIndex:
+    """
+    In-process index from normalized product name to (product id, price id).
+
+    The index lives at module level so it is built once per warm container.
+    Entries expire after `ttl_seconds` and at most `max_entries` names are
+    held (least recently used names are evicted first). Names missing from
+    the index are first looked up through the optional point `lookup`
+    source, and only then is the full catalog reloaded with `loader`, at
+    most once per `resolve` call and once per `min_refresh_seconds`. Names
+    that still don't resolve can be matched approximately against the
+    loaded catalog with `match`.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], Dict[str, PriceEntry]],
+        lookup: Optional[Callable[[List[str]], Dict[str, PriceEntry]]] = None,
+        ttl_seconds: int = PRICE_INDEX_TTL_SECONDS,
+        max_entries: int = PRICE_INDEX_MAX_ENTRIES,
+        min_refresh_seconds: int = PRICE_INDEX_MIN_REFRESH_SECONDS,
+    ):
+        self._loader = loader
+        self._lookup_source = lookup
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._min_refresh_seconds = min_refresh_seconds
+        self._refreshed_at: Optional[float] = None
+        self._entries: "OrderedDict[str, PriceEntry]" = OrderedDict()
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._matcher: Optional[FuzzyMatcher] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def is_stale(self) -> bool:
+        return (
+            self._loaded_at is None or monotonic() - self._loaded_at > self._ttl_seconds
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = OrderedDict()
+            self._loaded_at = monotonic()
+            self._matcher = None
+
+    def _claim_refresh(self) -> bool:
+        """
+        Whether a miss may reload the catalog now; claims the reload so
+        concurrent misses don't reload it again.
+        """
+        with self._lock:
+            now = monotonic()
+            if (
+                self._refreshed_at is not None
+                and now - self._refreshed_at < self._min_refresh_seconds
+            ):
+                return False
+            self._refreshed_at = now
+            return True
+
+    def refresh(self) -> None:
+        with self._lock:
+            self._refreshed_at = monotonic()
+        entries = self._loader()
+        with self._lock:
+            self._entries = OrderedDict()
+            for name, entry in entries.items():
+                self._put(name, entry)
+            self._loaded_at = monotonic()
+            self._matcher = None
+
+    def get(self, name: str) -> Optional[PriceEntry]:
+        key = normalize_product_name(name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, name: str, product_id: str, price_id: str) -> None:
+        with self._lock:
+            self._put(normalize_product_name(name), (product_id, price_id))
+
+    def _put(self, key: str, entry: PriceEntry) -> None:
+        if key not in self._entries:
+            self._matcher = None
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def resolve(self, names: Iterable[str]) -> Tuple[Dict[str, PriceEntry], List[str]]:
+        """
+        Resolve product names against the index.
+
+        Args:
+            names: Product names as received from the agent.
+
+        Returns:
+            A dict of normalized name -> (product id, price id) for every
+            resolved name, and the list of names that could not be resolved.
+        """
+        if self.is_stale():
+            self.clear()
+
+        resolved, missing = self._lookup(list(names))
+        if missing and self._lookup_source is not None:
+            found = self._lookup_source(missing)
+            with self._lock:
+                for key, entry in found.items():
+                    self._put(key, entry)
+            resolved.update(found)
+            missing = [
+                name for name in missing if normalize_product_name(name) not in found
+            ]
+        if missing and self._claim_refresh():
+            # The catalog may have changed since the last load; reload once.
+            self.refresh()
+            found, missing = self._lookup(missing)
+            resolved.update(found)
+        return resolved, missing
+
+    def match(
+        self, names: Iterable[str], min_score: float = FUZZY_MATCH_MIN_SCORE
+    ) -> Tuple[Dict[str, Tuple[str, float]], List[str]]:
+        """
+        Approximately match names against the names currently in the index,
+        e.g. "fresh strawberries" to "strawberries".
+
+        Args:
+            names: Product names that didn't resolve exactly.
+            min_score: Lowest similarity score (0 to 1) accepted as a match.
+
+        Returns:
+            A dict of normalized name -> (matched catalog name, score) and the
+            list of names without a good enough match.
+        """
+        with self._lock:
+            if self._matcher is None:
+                self._matcher = FuzzyMatcher(self._entries.keys())
+            matcher = self._matcher
+
+        matches: Dict[str, Tuple[str, float]] = {}
+        missing: List[str] = []
+        for name in names:
+            best = matcher.best_match(name)
+            if best is None or best[1] < min_score:
+                missing.append(name)
+            else:
+                matches[normalize_product_name(name)] = best
+        return matches, missing
+
+    def _lookup(self, names: List[str]) -> Tuple[Dict[str, PriceEntry], List[str]]:
+        resolved: Dict[str, PriceEntry] = {}
+        missing: List[str] = []
+        for name in names:
+            entry = self.get(name)
+            if entry is None:
+                missing.append(name)
+            else:
+                resolved[normalize_product_name(name)] = entry
+        return resolved, missing
@@ -0,0 +1,83 @@
+import os
+from typing import Dict, Iterable, Optional, Tuple
+
+import requests
+import stripe
+from requests.adapters import HTTPAdapter
+
+from grocery_shared.product import normalize_product_name
+from utilities.concurrency import bounded_map
+from utilities.price_index import PriceEntry
+
+STRIPE_MAX_IN_FLIGHT = int(os.environ.get("STRIPE_MAX_IN_FLIGHT", "8"))
+STRIPE_TIMEOUT_SECONDS = int(os.environ.get("STRIPE_TIMEOUT_SECONDS", "20"))
+
+
+def configure_stripe_http_client(
+    max_in_flight: int = STRIPE_MAX_IN_FLIGHT,
+) -> None:
+    """
+    Route every `stripe` call through one keep-alive `requests` session.
+
+    The connection pool holds `max_in_flight` connections and blocks when
+    they are all busy, so concurrent lookups reuse warm TLS connections and
+    never open more than `max_in_flight` at a time.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=1, pool_maxsize=max_in_flight, pool_block=True
+    )
+    session.mount("https://", adapter)
+    stripe.default_http_client = stripe.RequestsClient(
+        timeout=STRIPE_TIMEOUT_SECONDS, session=session
+    )
+
+
+def load_stripe_catalog() -> Dict[str, PriceEntry]:
+    """
+    Load the whole Stripe catalog in a single paginated pass.
+
+    Prices are listed with their product expanded, so one page gives us both
+    ids. Stripe returns the newest prices first, so the first price seen for
+    a product is the one used, matching `stripe.Price.list(product=..., limit=1)`.
+    """
+    entries: Dict[str, PriceEntry] = {}
+    prices = stripe.Price.list(active=True, limit=100, expand=["data.product"])
+    for price in prices.auto_paging_iter():
+        product = price.product
+        if not product.active:
+            continue
+        entries.setdefault(normalize_product_name(product.name), (product.id, price.id))
+    return entries
+
+
+def _search_stripe_price(name: str) -> Optional[Tuple[str, PriceEntry]]:
+    escaped = name.replace("\\", "\\\\").replace('"', '\\"')
+    products = stripe.Product.search(
+        query=f'active:"true" AND name:"{escaped}"', limit=1
+    )
+    if not products.data:
+        return None
+    product = products.data[0]
+    prices = stripe.Price.list(product=product.id, active=True, limit=1)
+    if not prices.data:
+        return None
+    return normalize_product_name(name), (product.id, prices.data[0].id)
+
+
+def lookup_stripe_prices(
+    names: Iterable[str], max_in_flight: int = STRIPE_MAX_IN_FLIGHT
+) -> Dict[str, PriceEntry]:
+    """
+    Look names up in Stripe one by one, with up to `max_in_flight` product
+    searches and price lookups running concurrently.
+
+    Args:
+        names: Product names to look up.
+        max_in_flight: Maximum number of concurrent lookups.
+
+    Returns:
+        dict: Normalized name -> (product id, price id) for every name found.
+    """
+    results = bounded_map(_search_stripe_price, names, max_in_flight)
+    return dict(result for result in results if result is not None)
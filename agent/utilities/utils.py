@@ -1,69 +1,69 @@
 import re
 
-import boto3
-import json
-from typing import List, Optional
-from pydantic import BaseModel
+from typing import TYPE_CHECKING, Iterator, List, NamedTuple, Optional
 
+if TYPE_CHECKING:
+    from utilities.item_models import ItemList
 
-def get_stripe_key() -> str:
+
+class ParsedItem(NamedTuple):
     """
-    Fetch Stripe secret key from AWS Secrets Manager.
-    Adjust the SecretId and region name based on your setup.
+    Lightweight, tuple-backed item used on the hot path; the pydantic `Item`
+    of utilities/item_models.py is only built when the items are validated
+    at the API boundary, by `parse_raw_items`.
     """
-    secret_name = "dev/stripe-secret"  # Replace with your actual secret name for Stripe
-    region_name = "us-east-1"  # Replace with your secrets region
 
-    # Create a session and Secrets Manager client
-    session = boto3.session.Session()
-    client = session.client(service_name="secretsmanager", region_name=region_name)
+    name: str
+    quantity: int
+    unit: Optional[str] = None
 
-    try:
-        # Retrieve the secret value
-        response = client.get_secret_value(SecretId=secret_name)
-        secret_string = response[
-            "SecretString"
-        ]  # e.g., '{"STRIPE_SECRET_KEY": "sk_test_123..."}'
-        secret_dict = json.loads(secret_string)
 
-        # Adjust the key used here to match your secret's JSON structure
-        return secret_dict.get("STRIPE_SECRET_KEY", "")
-    except Exception as e:
-        print(f"Error retrieving Stripe secret key: {e}")
-        return ""
+# One compiled pass over the joined input. Bedrock splits the array parameter
+# on commas, so the fragments are re-joined with commas and a name may itself
+# contain commas. The name runs greedily up to "quantity=" and can't cross
+# into the next item since it excludes braces and "=" (of the next "name=").
+_ITEM_RE = re.compile(r"name=([^{}=]*)quantity=(\d+)(?:[\s,]+unit=([^,{}]*))?")
+_SEPARATORS = ", \t\r\n"
 
 
-class Item(BaseModel):
-    name: str
-    quantity: int
-    unit: Optional[str] = None  # Make unit optional
+def iter_raw_items(raw_data: List[str]) -> Iterator[ParsedItem]:
+    """
+    Tokenize the Bedrock `[{name=..., quantity=..., unit=...}]` format.
 
+    Args:
+        raw_data: The `products` array fragments as received from the agent.
 
-class ItemList(BaseModel):
-    products: List[Item]
+    Yields:
+        ParsedItem: One item per `name=... quantity=...` group, in order.
+    """
+    new_item = tuple.__new__
+    for name, quantity, unit in _ITEM_RE.findall(",".join(raw_data)):
+        yield new_item(
+            ParsedItem,
+            (
+                " ".join(name.rstrip(_SEPARATORS).split()),
+                int(quantity),
+                unit.strip() or None,
+            ),
+        )
 
 
-def parse_raw_items(raw_data: List[str]) -> ItemList:
-    # Join the list into a single string and normalize spacing
-    raw_string = " ".join(raw_data)
-    raw_string = re.sub(r"\s+", " ", raw_string).strip()
+def parse_raw_items(raw_data: List[str]) -> "ItemList":
+    """
+    Tokenize and validate the agent's products in a single pydantic call.
 
-    # Update regex to make unit optional
-    matches = re.findall(
-        r"name=([^,]+?)\s+quantity=(\d+)(?:\s+unit=([^}]+))?", raw_string
-    )
+    pydantic is imported on first use, so modules that only tokenize (the
+    fast path of invoke_agent) don't pay for it at cold start.
 
-    # Convert to structured data
-    items = [
-        Item(
-            name=name.strip(),
-            quantity=int(quantity),
-            unit=unit.strip() if unit else None,
-        )
-        for name, quantity, unit in matches
-    ]
+    Raises:
+        ValueError: (pydantic's ValidationError) no items, an empty name or
+            a quantity below 1.
+    """
+    from utilities.item_models import ItemList
 
-    return ItemList(products=items)
+    return ItemList.model_validate(
+        {"products": [item._asdict() for item in iter_raw_items(raw_data)]}
+    )
 
 
 """data = ['[{name=Fresh Smoothies', ' quantity=2}', ' {name=fresh strawberries', ' quantity=3}', ' {name=mixed fruits', ' quantity=4}', ' {name=packaged fruits', ' quantity=2}', ' {name=Pineapples', ' quantity=5}]']
@@ -6,12 +6,15 @@ from grocery_ai_agent_cdk.ai_agent_stack import AiAgentStack
 from grocery_ai_agent_cdk.api_lambda_s3_sfn_stack import ApiLambdaS3SfnStack
 
 from grocery_ai_agent_cdk.database_stack import DatabaseStack
+from grocery_ai_agent_cdk.layer_stack import LayerStack
 from grocery_ai_agent_cdk.pipes_eb_stack import PipesAndEventbridgeStack
 from grocery_ai_agent_cdk.sqs_stack import SQSStack
 
 app = cdk.App()
 
 sqs_stack = SQSStack(app, "SQSStack")
+# Create the shared Lambda layer stack
+layer_stack = LayerStack(app, "LayerStack")
 # Create the database stack
 db_stack = DatabaseStack(app, "DatabaseStack")
 
@@ -21,6 +24,7 @@ api_lambda_stack = ApiLambdaS3SfnStack(
     "ApiLambdaS3SfnStack",
     sqs_queue=sqs_stack.sqs_queue,
     ecommerce_table=db_stack.ecommerce_table,
+    shared_layer=layer_stack.shared_layer,
 )
 
 pipes_eb_stack = PipesAndEventbridgeStack(
@@ -37,6 +41,7 @@ ai_agent_stack = AiAgentStack(
     app,
     "AiAgentStack",
     secret=api_lambda_stack.secret,
+    shared_layer=layer_stack.shared_layer,
     invoke_agent_lambda=api_lambda_stack.invoke_agent_lambda,
     ecommerce_table=db_stack.ecommerce_table,
 )
@@ -1,50 +1,53 @@
 import json
 import os
+from decimal import Decimal
 
 import boto3
+from aws_lambda_powertools import Logger
+from grocery_shared.dynamodb import create_dynamodb_client
 
-dynamodb = boto3.resource('dynamodb')
-table_name = os.environ.get("ECOMMERCE_TABLE_NAME")
-table = dynamodb.Table(table_name)
-
-with open("product_list.json", "r") as product_list:
-    product_list = json.load(product_list)
-
-def handler(event, context):
-    print("Retrieving all products: %s", product_list)
-    print(f"item id is {product_list[0]['productId']}")
-
-    try:
-        with table.batch_writer() as batch:
-            for item in product_list:
-                batch.put_item(
-                    Item={
-                        "PK": f"PRODUCT",
-                        "SK": f"PRODUCT#{item['productId']}",
-                        "productId": item["productId"],
-                        "category": item["category"],
-                        "createdDate": item["createdDate"],
-                        "description": item["description"],
-                        "modifiedDate": item["modifiedDate"],
-                        "name": item["name"],
-                        "package": item["package"],
-                        "pictures": item["pictures"],
-                        "price": item["price"],
-                        "tags": item["tags"],
-                    }
-                )
-        return True
-    except Exception as e:
-        print(f"Exception: {e}")
-        return False
-
-
-
-
-
+from ingest import INGEST_MAX_WORKERS, IngestStats, ingest, iter_ndjson
 
+table_name = os.environ.get("ECOMMERCE_TABLE_NAME")
+# One pooled connection per worker
+dynamodb_client = create_dynamodb_client(INGEST_MAX_WORKERS)
+s3_client = boto3.client("s3")
 
+logger = Logger(service="batch_upload_products")
 
 
+def load_bundled_products():
+    with open("product_list.json", "r") as product_list:
+        return json.load(product_list, parse_float=Decimal)
 
 
+@logger.inject_lambda_context
+def handler(event, context):
+    """
+    Write the product catalog to the table.
+
+    When the event (or the AppSync mutation arguments) has a "bucket" and a
+    "key", the catalog is streamed line by line from that NDJSON object, one
+    product per line. Otherwise the bundled product_list.json is written.
+    The `batchUploadProducts` mutation invokes this asynchronously with a
+    "runId", which is added to every log record.
+
+    Returns:
+        str: The JSON run report: written, failed and retried counts,
+        BatchWriteItem requests, duration and items per second. It is also
+        logged as "Ingestion finished".
+    """
+    logger.append_keys(run_id=event.get("runId"))
+    arguments = event.get("arguments") or event
+    stats = IngestStats()
+    if arguments.get("bucket") and arguments.get("key"):
+        logger.info(f"Streaming catalog s3://{arguments['bucket']}/{arguments['key']}")
+        body = s3_client.get_object(Bucket=arguments["bucket"], Key=arguments["key"])[
+            "Body"
+        ]
+        products = iter_ndjson(body.iter_lines(), stats)
+    else:
+        products = load_bundled_products()
+
+    report = ingest(dynamodb_client, table_name, products, stats=stats)
+    return json.dumps(report)
@@ -0,0 +1,174 @@
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from aws_lambda_powertools import Logger
+
+from grocery_shared.product import Product
+
+# Parallel BatchWriteItem requests
+INGEST_MAX_WORKERS = int(os.environ.get("INGEST_MAX_WORKERS", "8"))
+# Attempts per batch while DynamoDB returns UnprocessedItems
+INGEST_MAX_ATTEMPTS = int(os.environ.get("INGEST_MAX_ATTEMPTS", "8"))
+INGEST_BASE_DELAY_SECONDS = float(os.environ.get("INGEST_BASE_DELAY_SECONDS", "0.05"))
+INGEST_MAX_DELAY_SECONDS = float(os.environ.get("INGEST_MAX_DELAY_SECONDS", "5"))
+
+# BatchWriteItem accepts at most 25 put requests
+BATCH_SIZE = 25
+
+logger = Logger(child=True)
+
+
+def to_item(product: dict) -> dict:
+    """
+    The catalog table item of a product, in the low-level AttributeValue
+    format. GSI4 lists the products of a category.
+    """
+    sort_key = f"PRODUCT#{product['productId']}"
+    return Product.from_dict(product).to_item(
+        PK="PRODUCT",
+        SK=sort_key,
+        GSI4PK=f"CATEGORY#{product['category']}",
+        GSI4SK=sort_key,
+    )
+
+
+class IngestStats:
+    """
+    Thread-safe counters of an ingestion run.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self.written = 0
+        self.failed = 0
+        self.retries = 0
+        self.requests = 0
+
+    def add(self, written=0, failed=0, retries=0, requests=0) -> None:
+        with self._lock:
+            self.written += written
+            self.failed += failed
+            self.retries += retries
+            self.requests += requests
+
+    def report(self) -> dict:
+        seconds = time.monotonic() - self._started
+        return {
+            "written": self.written,
+            "failed": self.failed,
+            "retries": self.retries,
+            "requests": self.requests,
+            "seconds": round(seconds, 3),
+            "items_per_second": round(self.written / seconds, 1) if seconds else 0.0,
+        }
+
+
+def iter_ndjson(lines: Iterable[bytes], stats: IngestStats) -> Iterator[dict]:
+    """
+    Parse newline-delimited JSON products one line at a time, with decimal
+    numbers as Decimal. Invalid lines are counted as failures and skipped.
+    """
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line, parse_float=Decimal)
+        except ValueError as e:
+            logger.warning(f"Skipping invalid line {number}: {e}")
+            stats.add(failed=1)
+
+
+def write_batch(client, table_name: str, items: List[dict], stats: IngestStats):
+    """
+    Write up to 25 items with BatchWriteItem, retrying the UnprocessedItems
+    with full-jitter exponential backoff. Items still unprocessed after
+    INGEST_MAX_ATTEMPTS, or in a failed request, are counted as failures.
+    """
+    requests = [{"PutRequest": {"Item": item}} for item in items]
+    for attempt in range(INGEST_MAX_ATTEMPTS):
+        if attempt:
+            stats.add(retries=1)
+            delay = min(
+                INGEST_MAX_DELAY_SECONDS, INGEST_BASE_DELAY_SECONDS * 2**attempt
+            )
+            time.sleep(random.uniform(0, delay))
+        try:
+            response = client.batch_write_item(RequestItems={table_name: requests})
+        except Exception as e:
+            logger.error(f"BatchWriteItem of {len(requests)} items failed: {e}")
+            stats.add(failed=len(requests), requests=1)
+            return
+        unprocessed = response.get("UnprocessedItems", {}).get(table_name, [])
+        stats.add(written=len(requests) - len(unprocessed), requests=1)
+        if not unprocessed:
+            return
+        requests = unprocessed
+    logger.error(
+        f"{len(requests)} items still unprocessed after {INGEST_MAX_ATTEMPTS} attempts"
+    )
+    stats.add(failed=len(requests))
+
+
+def ingest(
+    client,
+    table_name: str,
+    products: Iterable[dict],
+    max_workers: int = INGEST_MAX_WORKERS,
+    stats: Optional[IngestStats] = None,
+) -> dict:
+    """
+    Write products to the catalog table through parallel BatchWriteItem
+    workers.
+
+    Products are consumed lazily and at most two batches per worker are
+    queued, so memory stays flat however large the catalog is. Products
+    repeated within a batch are written once (the last one wins), since
+    BatchWriteItem rejects duplicate keys.
+
+    Args:
+        client: A low-level DynamoDB client (thread-safe).
+        table_name: The catalog table.
+        products: Product dicts, e.g. from `iter_ndjson`.
+        max_workers: Concurrent BatchWriteItem requests.
+        stats: Counters to report into, e.g. shared with `iter_ndjson`.
+
+    Returns:
+        dict: Written, failed and retried counts, requests and throughput.
+    """
+    stats = stats or IngestStats()
+    slots = threading.BoundedSemaphore(max_workers * 2)
+
+    def run(items: List[dict]):
+        try:
+            write_batch(client, table_name, items, stats)
+        finally:
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        batch: Dict[str, dict] = {}
+        for product in products:
+            try:
+                item = to_item(product)
+            except (KeyError, TypeError) as e:
+                logger.warning(f"Skipping invalid product: {e}")
+                stats.add(failed=1)
+                continue
+            batch[item["SK"]["S"]] = item
+            if len(batch) == BATCH_SIZE:
+                slots.acquire()
+                executor.submit(run, list(batch.values()))
+                batch = {}
+        if batch:
+            slots.acquire()
+            executor.submit(run, list(batch.values()))
+
+    report = stats.report()
+    logger.info("Ingestion finished", extra=report)
+    return report
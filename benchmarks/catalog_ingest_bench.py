@@ -0,0 +1,139 @@
+"""
+Benchmark of the streaming catalog ingestion of batch_upload_products.
+
+Streams a generated NDJSON catalog through batch_upload_products/ingest.py
+into a local DynamoDB stand-in, once with a single worker (sequential
+25-item batches, like the previous `table.batch_writer()` loop) and once
+per --workers value, and reports throughput, retries and failures.
+
+The stand-in answers BatchWriteItem after --latency-ms, validates requests
+like DynamoDB (at most 25 items, no duplicate keys, AttributeValue format)
+and throttles writes above --capacity items per second by returning them
+as UnprocessedItems, which exercises the jittered retries.
+
+Usage:
+    python benchmarks/catalog_ingest_bench.py [--items 20000]
+        [--workers 4 8 16] [--latency-ms 10] [--capacity 8000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(ROOT, "batch_upload_products"))
+sys.path.insert(0, os.path.join(ROOT, "shared"))
+
+from ingest import IngestStats, ingest, iter_ndjson  # noqa: E402
+
+TABLE = "GroceryAppTable"
+
+
+class LocalDynamoDB:
+    """
+    Thread-safe in-memory stand-in for the BatchWriteItem API.
+    """
+
+    def __init__(self, latency_seconds: float, capacity_per_second: float):
+        self._latency = latency_seconds
+        self._capacity = capacity_per_second
+        # no burst credit, so throttling starts as soon as writes outpace it
+        self._tokens = 0.0
+        self._refilled = time.monotonic()
+        self._lock = threading.Lock()
+        self.items = {}
+
+    def _take(self, count: int) -> int:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self._capacity,
+                self._tokens + (now - self._refilled) * self._capacity,
+            )
+            self._refilled = now
+            granted = min(count, int(self._tokens))
+            self._tokens -= granted
+            return granted
+
+    def batch_write_item(self, RequestItems):
+        requests = RequestItems[TABLE]
+        assert len(requests) <= 25, "too many items"
+        keys = [
+            (r["PutRequest"]["Item"]["PK"]["S"], r["PutRequest"]["Item"]["SK"]["S"])
+            for r in requests
+        ]
+        assert len(set(keys)) == len(keys), "duplicate keys"
+        time.sleep(self._latency)
+        granted = self._take(len(requests))
+        with self._lock:
+            for key, request in zip(keys[:granted], requests[:granted]):
+                self.items[key] = request["PutRequest"]["Item"]
+        unprocessed = requests[granted:]
+        return {"UnprocessedItems": {TABLE: unprocessed} if unprocessed else {}}
+
+
+def make_catalog(count: int):
+    for i in range(count):
+        yield (
+            json.dumps(
+                {
+                    "productId": f"sku-{i:08d}",
+                    "category": ("fruit", "dairy", "bakery")[i % 3],
+                    "createdDate": "2017-04-17T01:14:03 -02:00",
+                    "description": "Culpa non veniam deserunt dolor irure elit.",
+                    "modifiedDate": "2019-03-13T12:18:27 -01:00",
+                    "name": f"Product {i}",
+                    "package": {
+                        "height": 948,
+                        "length": 455,
+                        "weight": 54,
+                        "width": 905,
+                    },
+                    "pictures": [f"https://example.com/{i}.jpg"],
+                    "price": 100 + i % 9000,
+                    "tags": ["mollit", "ad"],
+                }
+            ).encode()
+        )
+
+
+def run(items: int, workers: int, latency: float, capacity: float) -> dict:
+    database = LocalDynamoDB(latency, capacity)
+    stats = IngestStats()
+    report = ingest(
+        database,
+        TABLE,
+        iter_ndjson(make_catalog(items), stats),
+        max_workers=workers,
+        stats=stats,
+    )
+    assert len(database.items) == report["written"]
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--latency-ms", type=float, default=10)
+    parser.add_argument("--capacity", type=float, default=8_000)
+    args = parser.parse_args()
+
+    print(
+        f"{'workers':>8}{'written':>9}{'failed':>8}{'retries':>9}"
+        f"{'requests':>10}{'seconds':>9}{'items/s':>10}"
+    )
+    for workers in [1, *args.workers]:
+        report = run(args.items, workers, args.latency_ms / 1000, args.capacity)
+        print(
+            f"{workers:>8}{report['written']:>9}{report['failed']:>8}"
+            f"{report['retries']:>9}{report['requests']:>10}"
+            f"{report['seconds']:>9.2f}{report['items_per_second']:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
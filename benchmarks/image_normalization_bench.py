@@ -0,0 +1,108 @@
+"""
+Benchmark of the image normalization done by the S3 workflow trigger.
+
+Normalizes sample images with step_functions_workflow_trigger/
+image_normalizer.py and reports, per image, the bytes sent to Textract
+before and after, the normalized size, and the normalization time with
+Pillow's JPEG draft mode (as deployed) and with a full decode.
+
+Without --images, synthetic 12 MP and 48 MP phone photos (a list on a noisy
+background, rotated through EXIF) are generated. Draft mode only pays off
+for images over twice the target size, like 48 MP photos.
+
+Usage:
+    python benchmarks/image_normalization_bench.py [--images DIR]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from io import BytesIO
+
+from PIL import Image, ImageDraw, ImageOps
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "step_functions_workflow_trigger")
+)
+
+from image_normalizer import (  # noqa: E402
+    MAX_SIDE,
+    NORMALIZE_JPEG_QUALITY,
+    normalize_image,
+)
+
+ITEMS = ("Milk x2", "Eggs 12", "2 kg tomatoes", "Bread, 1", "Coffee x1", "Rice, 2 kg")
+
+
+def synthetic_photo(seed: int, size=(4032, 3024)) -> bytes:
+    rng = random.Random(seed)
+    noise = Image.effect_noise(size, 40).convert("RGB")
+    background = Image.new("RGB", size, (rng.randint(180, 230),) * 3)
+    image = Image.blend(background, noise, 0.3)
+    draw = ImageDraw.Draw(image)
+    for i, item in enumerate(rng.sample(ITEMS, len(ITEMS))):
+        draw.text((400, 300 + i * 300), item, fill=(20, 20, 60), font_size=160)
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotated 90 degrees, as phones store portrait photos
+    output = BytesIO()
+    image.save(output, "JPEG", quality=92, exif=exif)
+    return output.getvalue()
+
+
+def normalize_full_decode(data: bytes) -> bytes:
+    with Image.open(BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image).convert("L")
+        image.thumbnail((MAX_SIDE, MAX_SIDE), Image.Resampling.LANCZOS)
+        output = BytesIO()
+        image.save(output, "JPEG", quality=NORMALIZE_JPEG_QUALITY, optimize=True)
+        return output.getvalue()
+
+
+def timed(fn, data, runs=3):
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = fn(data)
+    return result, (time.perf_counter() - start) / runs
+
+
+def load_images(directory):
+    if directory is None:
+        images = [(f"synthetic-{seed}.jpg", synthetic_photo(seed)) for seed in range(3)]
+        # 48 MP sensors, where draft mode decodes at half scale
+        images.append(("synthetic-48mp.jpg", synthetic_photo(3, (8064, 6048))))
+        return images
+    images = []
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith((".png", ".jpg", ".jpeg")):
+            with open(os.path.join(directory, name), "rb") as file:
+                images.append((name, file.read()))
+    return images
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--images", help="directory of sample images")
+    args = parser.parse_args()
+
+    print(
+        f"{'image':<22}{'original':>10}{'normalized':>12}{'size':>12}"
+        f"{'draft ms':>10}{'full ms':>9}"
+    )
+    total_before = total_after = 0
+    for name, data in load_images(args.images):
+        (normalized, size), draft_seconds = timed(normalize_image, data)
+        _, full_seconds = timed(normalize_full_decode, data)
+        total_before += len(data)
+        total_after += len(normalized)
+        print(
+            f"{name[:21]:<22}{len(data) / 1e6:>8.2f}MB{len(normalized) / 1e6:>10.2f}MB"
+            f"{f'{size[0]}x{size[1]}':>12}{draft_seconds * 1000:>10.0f}"
+            f"{full_seconds * 1000:>9.0f}"
+        )
+    print(f"bytes to Textract: {total_after / total_before:.0%} of the originals")
+
+
+if __name__ == "__main__":
+    main()
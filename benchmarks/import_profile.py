@@ -0,0 +1,73 @@
+"""
+Import-time profile of a Lambda handler module.
+
+Runs `python -X importtime` on the handler in a fresh interpreter and reports
+the import cost per top-level package, i.e. what a cold start pays before the
+first line of the handler runs.
+
+Usage:
+    python benchmarks/import_profile.py                    # agent/app.py
+    python benchmarks/import_profile.py --entry agent --module invoke_agent
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Placeholder settings so handler modules can be imported outside Lambda
+LAMBDA_ENV = {
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "AWS_ACCESS_KEY_ID": "profile",
+    "AWS_SECRET_ACCESS_KEY": "profile",
+    "AWS_EC2_METADATA_DISABLED": "true",
+    "POWERTOOLS_TRACE_DISABLED": "1",
+    "ECOMMERCE_TABLE_NAME": "GroceryAppTable",
+}
+
+
+def profile_imports(entry: str, module: str):
+    # The shared layer is mounted on the Lambda's import path at /opt/python
+    env = {**os.environ, **LAMBDA_ENV, "PYTHONPATH": os.path.join(ROOT, "shared")}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.join(ROOT, entry),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(result.stderr)
+
+    # Lines look like "import time: self [us] | cumulative | imported module";
+    # summing the self time per top-level package attributes every
+    # microsecond exactly once
+    packages = defaultdict(int)
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, _, name = line[len("import time:") :].split("|")
+        packages[name.strip().split(".")[0]] += int(own)
+        total += int(own)
+    return total, packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entry", default="agent", help="Lambda entry directory")
+    parser.add_argument("--module", default="app", help="Handler module name")
+    parser.add_argument("--top", type=int, default=15, help="Packages to list")
+    args = parser.parse_args()
+
+    total, packages = profile_imports(args.entry, args.module)
+    print(f"{args.entry}/{args.module}.py: {total / 1000:.1f} ms total import time")
+    for name, own in sorted(packages.items(), key=lambda p: -p[1])[: args.top]:
+        print(f"  {own / 1000:9.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Micro-benchmark of the agent's `products` parser.
+
+Compares the single-pass tokenizer in agent/utilities/utils.py against the
+previous implementation (join, uncompiled re.sub and re.findall, then one
+pydantic `Item` per match) on 10 to 10k item inputs in the comma-split form
+Bedrock sends, and checks that both return the same items.
+
+Usage:
+    python benchmarks/parse_raw_items_bench.py [--min-speedup 2.0]
+
+With --min-speedup the script exits non-zero when the tokenizer is slower
+than that factor on any size, so the gain can be enforced in CI.
+"""
+
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "agent"))
+
+from utilities.item_models import Item, ItemList  # noqa: E402
+from utilities.utils import iter_raw_items, parse_raw_items  # noqa: E402
+
+SIZES = (10, 100, 1_000, 10_000)
+
+
+def legacy_parse_raw_items(raw_data):
+    raw_string = " ".join(raw_data)
+    raw_string = re.sub(r"\s+", " ", raw_string).strip()
+    matches = re.findall(
+        r"name=([^,]+?)\s+quantity=(\d+)(?:\s+unit=([^}]+))?", raw_string
+    )
+    items = [
+        Item(
+            name=name.strip(),
+            quantity=int(quantity),
+            unit=unit.strip() if unit else None,
+        )
+        for name, quantity, unit in matches
+    ]
+    return ItemList(products=items)
+
+
+def make_input(size):
+    # "[{name=..., quantity=..., unit=...}, ...]" split on commas, like Bedrock
+    raw = ", ".join(
+        f"{{name=fresh product {i}, quantity={i % 9 + 1}"
+        + (", unit=kg}" if i % 2 else "}")
+        for i in range(size)
+    )
+    return f"[{raw}]".split(",")
+
+
+def best_of(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--min-speedup", type=float, default=None)
+    args = parser.parse_args()
+
+    print(
+        f"{'items':>7} {'legacy':>12} {'tokenizer':>12} {'validated':>12} {'speedup':>8}"
+    )
+    slowest = None
+    for size in SIZES:
+        raw = make_input(size)
+        expected = [
+            (item.name, item.quantity, item.unit)
+            for item in legacy_parse_raw_items(raw).products
+        ]
+        assert [tuple(item) for item in iter_raw_items(raw)] == expected
+
+        number = max(1, 10_000 // size)
+        legacy = best_of(lambda: legacy_parse_raw_items(raw), number)
+        tokenizer = best_of(lambda: list(iter_raw_items(raw)), number)
+        validated = best_of(lambda: parse_raw_items(raw), number)
+        speedup = legacy / tokenizer
+        slowest = speedup if slowest is None else min(slowest, speedup)
+        print(
+            f"{size:>7} {legacy * 1e6:>10.1f}us {tokenizer * 1e6:>10.1f}us "
+            f"{validated * 1e6:>10.1f}us {speedup:>7.1f}x"
+        )
+
+    if args.min_speedup is not None and slowest < args.min_speedup:
+        raise SystemExit(f"speedup {slowest:.1f}x is below {args.min_speedup}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Per-item cost of encoding catalog products to DynamoDB items.
+
+Compares, on a large batch of generated products:
+- "serializer": the previous path, copying each product into a fresh dict
+  and serializing it with boto3's TypeSerializer;
+- "model": `Product.from_dict(...).to_item(...)` from
+  shared/grocery_shared/product.py, as both catalog writers now do;
+- "to_item": the encoder alone, on already built products.
+
+Also reports the memory held by the batch as plain dicts and as products.
+
+Usage:
+    python benchmarks/product_encoding_bench.py [--items 100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from decimal import Decimal
+
+from boto3.dynamodb.types import TypeSerializer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "shared"))
+
+from grocery_shared.product import Product  # noqa: E402
+
+serializer = TypeSerializer()
+
+
+def make_products(count: int):
+    return [
+        {
+            "productId": f"sku-{i:08d}",
+            "category": ("fruit", "dairy", "bakery")[i % 3],
+            "createdDate": "2017-04-17T01:14:03 -02:00",
+            "description": "Culpa non veniam deserunt dolor irure elit.",
+            "modifiedDate": "2019-03-13T12:18:27 -01:00",
+            "name": f"Product {i}",
+            "package": {
+                "height": 948,
+                "length": 455,
+                "weight": Decimal("54.5"),
+                "width": 905,
+            },
+            "pictures": [f"https://example.com/{i}.jpg"],
+            "price": 100 + i % 9000,
+            "tags": ["mollit", "ad"],
+        }
+        for i in range(count)
+    ]
+
+
+def encode_serializer(product: dict) -> dict:
+    item = {
+        "PK": "PRODUCT",
+        "SK": f"PRODUCT#{product['productId']}",
+        "productId": product["productId"],
+        "category": product["category"],
+        "createdDate": product["createdDate"],
+        "description": product["description"],
+        "modifiedDate": product["modifiedDate"],
+        "name": product["name"],
+        "package": product["package"],
+        "pictures": product["pictures"],
+        "price": product["price"],
+        "tags": product["tags"],
+    }
+    return {name: serializer.serialize(value) for name, value in item.items()}
+
+
+def encode_model(product: dict) -> dict:
+    return Product.from_dict(product).to_item(
+        PK="PRODUCT", SK=f"PRODUCT#{product['productId']}"
+    )
+
+
+def timed(fn, items) -> float:
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - start) / len(items)
+
+
+def allocated(build) -> int:
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=100_000)
+    args = parser.parse_args()
+
+    products = make_products(args.items)
+    assert encode_serializer(products[0]) == encode_model(products[0])
+    models = [Product.from_dict(product) for product in products]
+
+    baseline = timed(encode_serializer, products)
+    results = [
+        ("serializer", baseline),
+        ("model", timed(encode_model, products)),
+        (
+            "to_item",
+            timed(
+                lambda product: product.to_item(
+                    PK="PRODUCT", SK=f"PRODUCT#{product.productId}"
+                ),
+                models,
+            ),
+        ),
+    ]
+    print(f"{'encoder':<12}{'us/item':>9}{'speedup':>9}")
+    for name, seconds in results:
+        print(f"{name:<12}{seconds * 1e6:>9.2f}{baseline / seconds:>8.1f}x")
+
+    dict_bytes = allocated(lambda: make_products(args.items))
+    model_bytes = allocated(
+        lambda: [Product.from_dict(product) for product in make_products(args.items)]
+    )
+    print(
+        f"memory per product: dict {dict_bytes / args.items:.0f} B, "
+        f"model {model_bytes / args.items:.0f} B"
+    )
+
+
+if __name__ == "__main__":
+    main()
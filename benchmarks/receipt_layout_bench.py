@@ -0,0 +1,102 @@
+"""
+Benchmark of the receipt layout stage of the TextractResults Lambda.
+
+Builds synthetic receipt pages (item words on the left, an optional
+quantity column, a price column, slightly skewed rows) as Textract WORD and
+LINE blocks, and compares the "item | qty | unit" rows of
+textract_results/layout.py with the LINE texts joined by newlines (what the
+workflow sent to the model before): characters and estimated tokens of the
+model input, and layout time per page.
+
+Usage:
+    python benchmarks/receipt_layout_bench.py
+"""
+
+import os
+import random
+import sys
+import timeit
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(ROOT, "textract_results"))
+sys.path.insert(0, os.path.join(ROOT, "shared"))
+
+from layout import PageWords, layout_text  # noqa: E402
+
+# rows per page; a receipt page fits about 30 rows
+SIZES = (10, 20, 30)
+ITEMS = (
+    "ORG WHOLE MILK",
+    "BANANAS",
+    "CHEDDAR CHEESE",
+    "SOURDOUGH BREAD",
+    "FREE RANGE EGGS",
+    "TOMATOES",
+    "GREEK YOGURT",
+    "OLIVE OIL EXTRA VIRGIN",
+)
+CHAR_WIDTH = 0.012
+WORD_HEIGHT = 0.02
+
+
+def make_page(rows: int, rng: random.Random):
+    words, lines = [], []
+    for i in range(rows):
+        top = 0.02 + i * 0.03 + rng.uniform(-0.002, 0.002)
+        cells = [(0.05, rng.choice(ITEMS))]
+        if rng.random() < 0.5:
+            cells.append((0.55, rng.choice(("1", "2", "3", "2kg", "x4"))))
+        cells.append((0.8, f"{rng.uniform(0.5, 20):.2f}"))
+        for left, cell in cells:
+            for text in cell.split():
+                words.append(
+                    {
+                        "BlockType": "WORD",
+                        "Text": text,
+                        "Geometry": {
+                            "BoundingBox": {
+                                "Left": left,
+                                "Top": top + rng.uniform(-0.001, 0.001),
+                                "Width": CHAR_WIDTH * len(text),
+                                "Height": WORD_HEIGHT,
+                            }
+                        },
+                    }
+                )
+                left += CHAR_WIDTH * (len(text) + 1)
+        lines.append(" ".join(cell for _, cell in cells))
+    return words, lines
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def main():
+    rng = random.Random(7)
+    print(
+        f"{'rows':>6}{'lines chars':>13}{'rows chars':>12}{'tokens saved':>14}"
+        f"{'layout ms':>11}"
+    )
+    for size in SIZES:
+        blocks, lines = make_page(size, rng)
+        plain = "\n".join(lines)
+
+        def run():
+            words = PageWords()
+            for block in blocks:
+                words.add(block)
+            return layout_text(words)
+
+        table = run()
+        runs = 50
+        seconds = timeit.timeit(run, number=runs) / runs
+        saved = 1 - estimate_tokens(table) / estimate_tokens(plain)
+        print(
+            f"{size:>6}{len(plain):>13}{len(table):>12}{saved:>13.0%}"
+            f"{seconds * 1000:>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Coverage and speed of the SQS poller's rule-based extractor.
+
+Runs sqs_poller/rule_extractor.py over the labelled corpus in
+benchmarks/data/extraction_corpus.jsonl and reports the share of messages
+served without the Bedrock model, how many of those match their labelled
+items, and how many should have gone to the model instead (false serves).
+
+Each corpus line is {"text": ..., "expected": [[name, quantity, unit], ...]}
+with "expected": null for texts the model must handle (free-form notes,
+receipts, decimal quantities, ...).
+
+Usage:
+    python benchmarks/rule_extractor_bench.py [--min-confidence 1.0]
+        [--max-false-serves 0]
+
+Exits non-zero when the false serves exceed --max-false-serves.
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, os.path.join(ROOT, "sqs_poller"))
+sys.path.insert(0, os.path.join(ROOT, "shared"))
+
+from rule_extractor import extract  # noqa: E402
+
+CORPUS = os.path.join(os.path.dirname(__file__), "data", "extraction_corpus.jsonl")
+
+
+def load_corpus(path):
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--min-confidence", type=float, default=1.0)
+    parser.add_argument("--max-false-serves", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    served = correct = false_serves = missed = 0
+    for sample in corpus:
+        result = extract(sample["text"])
+        is_served = bool(result.items) and result.confidence >= args.min_confidence
+        expected = sample["expected"]
+        if not is_served:
+            missed += expected is not None
+            continue
+        served += 1
+        if expected is None:
+            false_serves += 1
+            print(f"false serve: {sample['text']!r}")
+        elif [list(item) for item in result.items] == expected:
+            correct += 1
+        else:
+            print(f"wrong items: {sample['text']!r} -> {result.items}")
+
+    structured = sum(sample["expected"] is not None for sample in corpus)
+    texts = [sample["text"] for sample in corpus]
+    runs = 200
+    seconds = timeit.timeit(lambda: [extract(text) for text in texts], number=runs)
+
+    print(f"messages:            {len(corpus)} ({structured} labelled structured)")
+    print(f"served without model: {served} ({served / len(corpus):.0%})")
+    print(f"  correct items:      {correct}")
+    print(f"  false serves:       {false_serves}")
+    print(f"structured but sent to model: {missed}")
+    print(f"extract time:        {seconds / runs / len(corpus) * 1e6:.1f} us/message")
+
+    if false_serves > args.max_false_serves:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Offline simulator of the PDF Textract polling loop of the state machine.
+
+Models StartDocumentTextDetection jobs whose duration grows with the page
+count (a few seconds of queueing plus ~1.5 s per page, log-normal noise),
+with PDFs of ~120 KB per scanned page, and replays the
+WaitForPDFConversion -> GetDocumentTextDetection -> IsPDFConversionComplete
+loop for each polling policy:
+
+- fixed: the previous definition, a 10 s wait before every poll.
+- adaptive: the current definition, a first wait sized from the object
+  size to about the expected job time, a second one half as long (the
+  job is usually close to done), then doubling after every poll up to a
+  ceiling. The constants below mirror the JSONata expressions in
+  state_machine_definition.json.
+
+Reports the detection delay (time between the job finishing and the
+workflow noticing it), the end-to-end wait, GetDocumentTextDetection calls
+and state transitions per document (3 per poll; Standard workflows are
+billed per transition), overall and for documents of 10 pages or more.
+
+Usage:
+    python benchmarks/textract_polling_sim.py [--documents 10000] [--seed 7]
+"""
+
+import argparse
+import math
+import random
+import statistics
+
+# Mirror of state_machine_definition.json
+MIN_WAIT_SECONDS = 4
+MAX_INITIAL_WAIT_SECONDS = 20
+MAX_WAIT_SECONDS = 60
+BYTES_PER_INITIAL_SECOND = 40_000
+FIRST_BACKOFF_RATE = 0.5
+BACKOFF_RATE = 2
+FIXED_WAIT_SECONDS = 10
+
+BYTES_PER_PAGE = 120_000
+TRANSITIONS_PER_POLL = 3
+PRICE_PER_TRANSITION = 0.025 / 1000
+
+
+def initial_wait(object_size: int) -> float:
+    seconds = MIN_WAIT_SECONDS + object_size / BYTES_PER_INITIAL_SECOND
+    return min(MAX_INITIAL_WAIT_SECONDS, seconds)
+
+
+def fixed_schedule(object_size: int):
+    while True:
+        yield FIXED_WAIT_SECONDS
+
+
+def adaptive_schedule(object_size: int):
+    wait = initial_wait(object_size)
+    rate = FIRST_BACKOFF_RATE
+    while True:
+        # Wait states take whole seconds
+        yield round(wait)
+        wait = min(wait * rate, MAX_WAIT_SECONDS)
+        rate = BACKOFF_RATE
+
+
+def simulate(schedule, object_size: int, job_seconds: float):
+    elapsed = 0.0
+    polls = 0
+    for wait in schedule(object_size):
+        elapsed += wait
+        polls += 1
+        if elapsed >= job_seconds:
+            return elapsed, polls
+
+
+def make_documents(count: int, rng: random.Random):
+    documents = []
+    for _ in range(count):
+        # mostly single page lists, with a long tail of multi-page scans
+        pages = min(200, max(1, int(rng.paretovariate(1.3))))
+        object_size = int(pages * BYTES_PER_PAGE * rng.uniform(0.5, 1.5))
+        job_seconds = (3 + 1.5 * pages) * rng.lognormvariate(0, 0.3)
+        documents.append((pages, object_size, job_seconds))
+    return documents
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, math.ceil(fraction * len(values)) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    documents = make_documents(args.documents, random.Random(args.seed))
+    single = sum(pages == 1 for pages, _, _ in documents)
+    print(f"{len(documents)} documents, {single / len(documents):.0%} single page")
+    print(
+        f"{'policy':<10}{'delay p50':>10}{'delay p95':>10}{'wait p50':>10}"
+        f"{'wait p95':>10}{'1-page p50':>12}{'polls':>8}{'$/1k docs':>11}"
+        f"{'10p+ polls':>12}{'10p+ p95':>10}"
+    )
+    for name, schedule in (("fixed", fixed_schedule), ("adaptive", adaptive_schedule)):
+        delays, waits, single_waits, polls = [], [], [], []
+        large_waits, large_polls = [], []
+        for pages, object_size, job_seconds in documents:
+            elapsed, count = simulate(schedule, object_size, job_seconds)
+            delays.append(elapsed - job_seconds)
+            waits.append(elapsed)
+            if pages == 1:
+                single_waits.append(elapsed)
+            if pages >= 10:
+                large_waits.append(elapsed)
+                large_polls.append(count)
+            polls.append(count)
+        mean_polls = statistics.mean(polls)
+        cost = mean_polls * TRANSITIONS_PER_POLL * PRICE_PER_TRANSITION * 1000
+        print(
+            f"{name:<10}{percentile(delays, 0.5):>9.1f}s{percentile(delays, 0.95):>9.1f}s"
+            f"{percentile(waits, 0.5):>9.1f}s{percentile(waits, 0.95):>9.1f}s"
+            f"{percentile(single_waits, 0.5):>11.1f}s"
+            f"{mean_polls:>8.2f}{cost:>11.4f}"
+            f"{statistics.mean(large_polls):>12.2f}"
+            f"{percentile(large_waits, 0.95):>9.1f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
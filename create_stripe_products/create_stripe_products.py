@@ -1,63 +1,84 @@
 import json
 import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import List, Optional, Tuple
 import boto3
+from boto3.dynamodb.table import BatchWriter
 from botocore.exceptions import ClientError
 from aws_lambda_powertools import Logger, Tracer
 import stripe
 from stripe import StripeError
 
-from utilities.utils import get_stripe_key
+from grocery_shared.product import Product, product_name_key
+from grocery_shared.secrets_cache import get_stripe_key, secrets_cache
+from utilities.catalog_sync import (
+    ARCHIVE,
+    CREATE,
+    RESTORE,
+    UNCHANGED,
+    SyncAction,
+    list_stripe_products,
+    plan_sync,
+    summarize,
+)
+from utilities.rate_limiter import TokenBucket
 
 dynamodb = boto3.resource("dynamodb")
+dynamodb_client = boto3.client("dynamodb")
 table_name = os.environ.get("ECOMMERCE_TABLE_NAME")
-table = dynamodb.Table(table_name)
 
 
+# Stripe allows 100 requests per second in live mode and 25 in test mode
+STRIPE_RATE_LIMIT = float(os.environ.get("STRIPE_RATE_LIMIT", "20"))
+STRIPE_MAX_IN_FLIGHT = int(os.environ.get("STRIPE_MAX_IN_FLIGHT", "8"))
+STRIPE_MAX_NETWORK_RETRIES = int(os.environ.get("STRIPE_MAX_NETWORK_RETRIES", "3"))
+# Only log and return the sync plan, unless the request says otherwise
+STRIPE_SYNC_DRY_RUN = os.environ.get("STRIPE_SYNC_DRY_RUN", "false").lower() == "true"
+# Stop starting products this long before the function times out
+STOP_MARGIN_MILLIS = int(os.environ.get("STOP_MARGIN_MILLIS", "30000"))
+
+rate_limiter = TokenBucket(rate=STRIPE_RATE_LIMIT, burst=STRIPE_MAX_IN_FLIGHT)
+
 # Load product list from JSON file
 with open("product_list.json", "r") as product_list_file:
-    product_list = json.load(product_list_file)
+    product_list = [Product.from_dict(data) for data in json.load(product_list_file)]
 
 logger = Logger(service="create_stripe_products")
 tracer = Tracer(service="create_stripe_products_service")
 
 
-def bulk_add_products_to_dynamodb(products):
+def bulk_add_products_to_dynamodb(rows, stale_keys=()):
     """
-    Bulk add products to DynamoDB.
-    Each product will have:
-    - PK: productId
-    - SK: stripe_price_id
-    - stripe: stripe_product_id
+    Bulk add products to DynamoDB, and delete the rows of `stale_keys`
+    (replaced prices and archived products).
+
+    `rows` are (product, stripe product id, stripe price id) tuples. Each
+    item will have:
+    - PK: stripe product id
+    - SK: stripe price id
+    - GSI3PK: normalized product name, for the agent's `productName` lookups
+    - the product fields, stripeProductId and stripePriceId
     """
     failed_items = []
     try:
-        with table.batch_writer() as batch:
-            for product in products:
+        # Items are encoded by `Product.to_item`, so they go through a
+        # low-level client rather than the resource layer's serializer
+        with BatchWriter(table_name, dynamodb_client) as batch:
+            for key in stale_keys:
+                batch.delete_item(Key={"PK": {"S": key["PK"]}, "SK": {"S": key["SK"]}})
+            for product, stripe_product_id, stripe_price_id in rows:
                 try:
-                    item = {
-                        # Partition Key
-                        "PK": product["stripe_product_id"],  # Partition Key
-                        "SK": product["stripe_price_id"],  # Sort Key (Stripe Price ID)
-                        "name": product["name"],
-                        "description": product["description"],
-                        "category": product["category"],
-                        "createdDate": product["createdDate"],
-                        "modifiedDate": product["modifiedDate"],
-                        "tags": product["tags"],
-                        "package": product["package"],
-                        "pictures": product["pictures"],
-                        "price": product["price"],
-                        "stripeProductId": product[
-                            "stripe_product_id"
-                        ],  # Stripe Product ID
-                        "stripePriceId": product[
-                            "stripe_price_id"
-                        ],  # Stripe Product ID
-                    }
+                    item = product.to_item(
+                        PK=stripe_product_id,
+                        SK=stripe_price_id,
+                        GSI3PK=product_name_key(product.name),
+                        stripeProductId=stripe_product_id,
+                        stripePriceId=stripe_price_id,
+                    )
                     batch.put_item(Item=item)
-                except ClientError as e:
+                except (ClientError, TypeError) as e:
                     logger.error(
-                        f"Failed to add product {product['productId']} to DynamoDB: {e}"
+                        f"Failed to add product {product.productId} to DynamoDB: {e}"
                     )
                     failed_items.append(product)
         if failed_items:
@@ -69,65 +90,266 @@ def bulk_add_products_to_dynamodb(products):
         raise
 
 
+def find_rows_to_restore(keys: List[dict]) -> set:
+    """
+    Return the (PK, SK) pairs of `keys` whose row is missing, or predates
+    the productName index (no GSI3PK) and so is invisible to the agent's
+    lookups.
+    """
+    found = set()
+    for start in range(0, len(keys), 100):
+        request = {
+            table_name: {
+                "Keys": keys[start : start + 100],
+                "ProjectionExpression": "PK, SK, GSI3PK",
+            }
+        }
+        while request:
+            response = dynamodb.batch_get_item(RequestItems=request)
+            found.update(
+                (item["PK"], item["SK"])
+                for item in response["Responses"].get(table_name, [])
+                if "GSI3PK" in item
+            )
+            request = response.get("UnprocessedKeys")
+    return {(key["PK"], key["SK"]) for key in keys} - found
+
+
+def product_fields(product: Product) -> dict:
+    return {
+        "name": product.name,
+        "description": product.description,
+        "metadata": {
+            "category": product.category,
+            "createdDate": product.createdDate,
+            "modifiedDate": product.modifiedDate,
+            "productId": product.productId,
+            "tags": ", ".join(product.tags),
+            "package": json.dumps(product.package.to_dict()),
+        },
+        "images": product.pictures,
+    }
+
+
+def create_price(
+    product: Product, stripe_product_id: str, replaces: Optional[str] = None
+) -> str:
+    """
+    Create the price of a product, replacing the price `replaces` if given.
+
+    The idempotency key names the replaced price, so a price changed back
+    and forth (A -> B -> A) within Stripe's idempotency window gets a new
+    price instead of the replayed, since archived, first one.
+    """
+    amount = product.price
+    rate_limiter.acquire()
+    price = stripe.Price.create(
+        unit_amount=amount,  # Price in cents
+        currency="usd",  # Currency code
+        product=stripe_product_id,  # Link to the product
+        idempotency_key=(
+            f"price-{product.productId}-{stripe_product_id}-{amount}-{replaces or 'new'}"
+        ),
+    )
+    logger.info(
+        f"Price created: {price.unit_amount / 100} {price.currency} (ID: {price.id})"
+    )
+    return price.id
+
+
+def create_product_and_price(product: Product) -> Tuple[str, str]:
+    """
+    Create a product and its price in Stripe, under the rate limiter.
+
+    The idempotency keys are derived from the product, so a retried or
+    resumed run returns the objects created by the first attempt (within
+    Stripe's 24 hour idempotency window) instead of duplicating them.
+
+    Returns:
+        The Stripe product id and price id.
+    """
+    rate_limiter.acquire()
+    stripe_product = stripe.Product.create(
+        **product_fields(product),
+        idempotency_key=f"product-{product.productId}-{product.modifiedDate}",
+    )
+    logger.info(f"Product created: {stripe_product.name} (ID: {stripe_product.id})")
+    return stripe_product.id, create_price(product, stripe_product.id)
+
+
+def apply_action(action: SyncAction) -> Tuple[str, Optional[str]]:
+    """
+    Apply a create, update or archive action to Stripe.
+
+    Returns:
+        The Stripe product id and its active price id (None once archived).
+    """
+    if action.kind == CREATE:
+        return create_product_and_price(action.product)
+
+    existing = action.existing
+    if action.kind == ARCHIVE:
+        rate_limiter.acquire()
+        stripe.Product.modify(existing.stripe_product_id, active=False)
+        logger.info(f"Product archived: {action.describe()}")
+        return existing.stripe_product_id, None
+
+    if "modifiedDate" in action.changes or "archived" in action.changes:
+        rate_limiter.acquire()
+        stripe.Product.modify(
+            existing.stripe_product_id, **product_fields(action.product), active=True
+        )
+        logger.info(f"Product updated: {action.describe()}")
+    price_id = existing.stripe_price_id
+    if "price" in action.changes:
+        price_id = create_price(
+            action.product, existing.stripe_product_id, existing.stripe_price_id
+        )
+        if existing.stripe_price_id:
+            rate_limiter.acquire()
+            stripe.Price.modify(existing.stripe_price_id, active=False)
+    return existing.stripe_product_id, price_id
+
+
 @logger.inject_lambda_context
 @tracer.capture_lambda_handler
 def handler(event, context):
+    """
+    Sync the product catalog to Stripe and the table.
+
+    Only the differences are applied: new products are created, changed
+    ones updated and removed ones archived (see `plan_sync`), and table rows
+    are written for these and for unchanged products whose row is missing or
+    lacks the productName index key.
+    With {"dryRun": true} in the event (or the mutation arguments), or
+    STRIPE_SYNC_DRY_RUN=true, the plan is only logged and returned.
+    The `createStripeProducts` mutation invokes this asynchronously with a
+    "runId", which is added to every log record.
+
+    Returns:
+        str: The plan in dry-run mode, otherwise a summary of the changes.
+        Both are also logged.
+    """
+    logger.append_keys(run_id=(event or {}).get("runId"))
+    arguments = (event or {}).get("arguments") or event or {}
+    dry_run = arguments.get("dryRun", STRIPE_SYNC_DRY_RUN)
+
     stripe_key = get_stripe_key()
-    if stripe_key is None:
+    logger.info("Secrets cache stats", extra=secrets_cache.stats)
+    if not stripe_key:
         logger.error("Stripe API key not set")
         raise ValueError("Stripe API key not set")
 
     # Set Stripe key
     stripe.api_key = stripe_key
-    logger.info("Retrieving all products: %s", product_list)
-
-    products_to_insert = []
-
-    # Iterate through the list and create products and prices
-    for product_data in product_list:
-        try:
-            # Create a product in Stripe
-            product = stripe.Product.create(
-                name=product_data["name"],
-                description=product_data["description"],
-                metadata={
-                    "category": product_data["category"],
-                    "createdDate": product_data["createdDate"],
-                    "modifiedDate": product_data["modifiedDate"],
-                    "productId": product_data["productId"],
-                    "tags": ", ".join(product_data["tags"]),
-                    "package": json.dumps(product_data["package"]),
-                },
-                images=product_data["pictures"],
-            )
-            logger.info(f"Product created: {product.name} (ID: {product.id})")
+    stripe.max_network_retries = STRIPE_MAX_NETWORK_RETRIES
 
-            # Create a price for the product in Stripe
-            price = stripe.Price.create(
-                unit_amount=product_data["price"],  # Price in cents
-                currency="usd",  # Currency code
-                product=product.id,  # Link to the product
-            )
-            logger.info(
-                f"Price created: {price.unit_amount / 100} {price.currency} (ID: {price.id})"
-            )
+    actions = plan_sync(product_list, list_stripe_products(rate_limiter.acquire))
+    unchanged = [action for action in actions if action.kind == UNCHANGED]
+    missing = find_rows_to_restore(
+        [
+            {
+                "PK": action.existing.stripe_product_id,
+                "SK": action.existing.stripe_price_id,
+            }
+            for action in unchanged
+        ]
+    )
+    actions = [
+        action._replace(kind=RESTORE)
+        if action.kind == UNCHANGED
+        and (action.existing.stripe_product_id, action.existing.stripe_price_id)
+        in missing
+        else action
+        for action in actions
+    ]
+    summary = summarize(actions)
+    logger.info("Sync plan", extra=summary)
 
-            # Prepare product data for DynamoDB
-            product_data["stripe_product_id"] = product.id  # Stripe Product ID
-            product_data["stripe_price_id"] = price.id  # Stripe Price ID
-            products_to_insert.append(product_data)
+    if dry_run:
+        lines = [action.describe() for action in actions if action.kind != UNCHANGED]
+        for line in lines:
+            logger.info(line)
+        return "\n".join(
+            [
+                "Dry run: "
+                + ", ".join(f"{count} {kind}" for kind, count in summary.items()),
+                *lines,
+            ]
+        )
 
-        except StripeError as e:
-            logger.error(
-                f"Error creating product or price for {product_data['name']}: {e.user_message}"
-            )
-            continue  # Skip this product and continue with the next one
+    rows = [
+        (
+            action.product,
+            action.existing.stripe_product_id,
+            action.existing.stripe_price_id,
+        )
+        for action in actions
+        if action.kind == RESTORE
+    ]
+    stale_keys = []
+
+    # Apply the changes concurrently, starting new ones only while there is
+    # time left to finish them before the function times out; the next run
+    # picks up whatever is left, as it diffs against Stripe again
+    remaining = iter(
+        action for action in actions if action.kind not in (UNCHANGED, RESTORE)
+    )
+    failed = 0
+    with ThreadPoolExecutor(max_workers=STRIPE_MAX_IN_FLIGHT) as executor:
+        futures = {}
+
+        def submit_next():
+            if context.get_remaining_time_in_millis() < STOP_MARGIN_MILLIS:
+                return
+            action = next(remaining, None)
+            if action is not None:
+                futures[executor.submit(apply_action, action)] = action
+
+        for _ in range(STRIPE_MAX_IN_FLIGHT):
+            submit_next()
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                action = futures.pop(future)
+                try:
+                    stripe_product_id, stripe_price_id = future.result()
+                except StripeError as e:
+                    logger.error(f"Error in {action.describe()}: {e.user_message}")
+                    failed += 1
+                else:
+                    existing = action.existing
+                    if (
+                        existing
+                        and existing.stripe_price_id
+                        and existing.stripe_price_id != stripe_price_id
+                    ):
+                        stale_keys.append(
+                            {
+                                "PK": existing.stripe_product_id,
+                                "SK": existing.stripe_price_id,
+                            }
+                        )
+                    if stripe_price_id:
+                        rows.append(
+                            (action.product, stripe_product_id, stripe_price_id)
+                        )
+                submit_next()
+    not_started = sum(1 for _ in remaining)
 
     # Bulk add products to DynamoDB
     try:
-        bulk_add_products_to_dynamodb(products_to_insert)
+        bulk_add_products_to_dynamodb(rows, stale_keys)
     except Exception as e:
         logger.error(f"Failed to bulk add products to DynamoDB: {e}")
         raise
 
-    return "Products and prices created successfully!"
+    message = "Synced catalog: " + ", ".join(
+        f"{count} {kind}" for kind, count in summary.items()
+    )
+    if failed:
+        message += f"; {failed} failed"
+    if not_started:
+        message += f"; {not_started} left, run again to resume"
+    logger.info(message)
+    return message
@@ -0,0 +1,171 @@
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import stripe
+
+from grocery_shared.product import Product
+
+# Stripe list pages hold at most 100 objects
+PAGE_SIZE = 100
+
+CREATE = "create"
+UPDATE = "update"
+ARCHIVE = "archive"
+# In Stripe and unchanged, but its table row is missing or has no GSI3PK
+RESTORE = "restore"
+UNCHANGED = "unchanged"
+
+
+class StripeProduct(NamedTuple):
+    """
+    A catalog product as it is in Stripe, with its active price.
+    """
+
+    product_id: str
+    stripe_product_id: str
+    stripe_price_id: Optional[str]
+    unit_amount: Optional[int]
+    modified_date: Optional[str]
+    active: bool
+    created: int
+
+
+class SyncAction(NamedTuple):
+    """
+    What the sync does for one product: `product` is the catalog entry
+    (None when archiving) and `existing` its Stripe product (None when
+    creating). `changes` names what differs.
+    """
+
+    kind: str
+    product_id: str
+    product: Optional[Product]
+    existing: Optional[StripeProduct]
+    changes: Tuple[str, ...] = ()
+
+    def describe(self) -> str:
+        line = f"{self.kind} {self.product_id}"
+        if self.existing:
+            line += f" [{self.existing.stripe_product_id}]"
+        if self.changes:
+            line += f": {', '.join(self.changes)}"
+        return line
+
+
+def list_all(list_method: Callable, acquire: Callable, **params) -> Iterator:
+    """
+    Page through a Stripe list endpoint, taking a rate limiter token with
+    `acquire` before each page.
+    """
+    starting_after = None
+    while True:
+        acquire()
+        page = list_method(limit=PAGE_SIZE, starting_after=starting_after, **params)
+        yield from page.data
+        if not page.has_more or not page.data:
+            return
+        starting_after = page.data[-1].id
+
+
+def list_stripe_products(acquire: Callable) -> List[StripeProduct]:
+    """
+    List the catalog products in Stripe, i.e. the products with a
+    `productId` metadata, archived ones included, with their newest active
+    price. Costs two requests per 100 products.
+    """
+    prices = {}
+    for price in list_all(stripe.Price.list, acquire, active=True):
+        current = prices.get(price.product)
+        if current is None or price.created > current.created:
+            prices[price.product] = price
+
+    products = []
+    for product in list_all(stripe.Product.list, acquire):
+        product_id = product.metadata.get("productId")
+        if not product_id:
+            continue
+        price = prices.get(product.id)
+        products.append(
+            StripeProduct(
+                product_id=product_id,
+                stripe_product_id=product.id,
+                stripe_price_id=price.id if price else None,
+                unit_amount=price.unit_amount if price else None,
+                modified_date=product.metadata.get("modifiedDate"),
+                active=product.active,
+                created=product.created,
+            )
+        )
+    return products
+
+
+def plan_sync(
+    catalog: Iterable[Product], stripe_products: Iterable[StripeProduct]
+) -> List[SyncAction]:
+    """
+    Diff the catalog against Stripe, matching products by `productId`.
+
+    - Catalog products missing from Stripe are created.
+    - Products whose `modifiedDate` or price differ, or that were archived,
+      are updated (a price change creates a new price, as prices are
+      immutable in Stripe).
+    - Active Stripe products no longer in the catalog are archived, and so
+      are duplicates left by earlier runs. The one kept is the newest
+      active product with a price.
+    - Everything else is unchanged.
+    """
+    matches: Dict[str, List[StripeProduct]] = {}
+    for existing in stripe_products:
+        matches.setdefault(existing.product_id, []).append(existing)
+
+    actions = []
+    catalog_by_id = {product.productId: product for product in catalog}
+    for product_id, product in catalog_by_id.items():
+        candidates = sorted(
+            matches.get(product_id, []),
+            key=lambda existing: (
+                existing.active,
+                existing.stripe_price_id is not None,
+                existing.created,
+            ),
+            reverse=True,
+        )
+        if not candidates:
+            actions.append(SyncAction(CREATE, product_id, product, None))
+            continue
+
+        existing = candidates[0]
+        changes = tuple(
+            name
+            for name, changed in (
+                ("modifiedDate", existing.modified_date != product.modifiedDate),
+                ("price", existing.unit_amount != product.price),
+                ("archived", not existing.active),
+            )
+            if changed
+        )
+        actions.append(
+            SyncAction(
+                UPDATE if changes else UNCHANGED, product_id, product, existing, changes
+            )
+        )
+        actions.extend(
+            SyncAction(ARCHIVE, product_id, None, duplicate, ("duplicate",))
+            for duplicate in candidates[1:]
+            if duplicate.active
+        )
+
+    for product_id, candidates in matches.items():
+        if product_id not in catalog_by_id:
+            actions.extend(
+                SyncAction(ARCHIVE, product_id, None, existing, ("removed",))
+                for existing in candidates
+                if existing.active
+            )
+    return actions
+
+
+def summarize(actions: Iterable[SyncAction]) -> Dict[str, int]:
+    summary = dict.fromkeys((CREATE, UPDATE, ARCHIVE, RESTORE, UNCHANGED), 0)
+    for action in actions:
+        summary[action.kind] += 1
+    return summary
@@ -1,7 +1,8 @@
 from aws_cdk import Stack, Duration
+from aws_cdk import aws_iam as iam
 from aws_cdk.aws_dynamodb import Table
 from aws_cdk.aws_lambda import Runtime, Tracing
-from aws_cdk.aws_lambda_python_alpha import PythonFunction
+from aws_cdk.aws_lambda_python_alpha import PythonFunction, PythonLayerVersion
 from aws_cdk.aws_secretsmanager import Secret
 from constructs import Construct
 from cdklabs.generative_ai_cdk_constructs.bedrock import (
@@ -21,6 +22,7 @@ class AiAgentStack(Stack):
         scope: Construct,
         construct_id: str,
         secret: Secret,
+        shared_layer: PythonLayerVersion,
         invoke_agent_lambda: PythonFunction,
         ecommerce_table: Table,
         **kwargs,
@@ -36,11 +38,13 @@ class AiAgentStack(Stack):
             handler="lambda_handler",
             timeout=Duration.minutes(2),
             memory_size=512,
+            layers=[shared_layer],
         )
         secret.grant_read(agent_lambda_function)
         agent_lambda_function.add_environment(
             "ECOMMERCE_TABLE_NAME", ecommerce_table.table_name
         )
+        agent_lambda_function.add_environment("STRIPE_SECRET_NAME", secret.secret_name)
         # Bedrock AI Agent
         agent = Agent(
             self,
@@ -48,6 +52,13 @@ class AiAgentStack(Stack):
             foundation_model=BedrockFoundationModel.ANTHROPIC_CLAUDE_3_5_SONNET_V1_0,
             instruction="You are a helpful and friendly AI assistant.",
         )
+        # invoke_agent streams the final response (streamFinalResponse)
+        agent.role.add_to_principal_policy(
+            iam.PolicyStatement(
+                actions=["bedrock:InvokeModelWithResponseStream"],
+                resources=["*"],
+            )
+        )
         executor_group = ActionGroupExecutor(lambda_=agent_lambda_function)
 
         # agent action group
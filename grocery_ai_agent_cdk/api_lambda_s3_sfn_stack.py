@@ -1,4 +1,5 @@
 import json
+from typing import Optional
 
 from aws_cdk import (
     Stack,
@@ -20,7 +21,24 @@ from aws_cdk.aws_lambda import (
 )
 from aws_cdk.aws_sqs import Queue
 from constructs import Construct
-from aws_cdk.aws_lambda_python_alpha import PythonFunction
+from aws_cdk.aws_lambda_python_alpha import PythonFunction, PythonLayerVersion
+
+# How long AppSync serves product reads from its cache
+PRODUCT_CACHE_TTL = Duration.minutes(5)
+
+
+def resolver_template(
+    file_name: str, table: Optional[Table] = None
+) -> aws_appsync.MappingTemplate:
+    """
+    Load a VTL mapping template from graphql/resolvers, with ${TableName}
+    replaced by the name of the table (BatchGetItem needs it literally).
+    """
+    with open(f"graphql/resolvers/{file_name}") as template:
+        text = template.read()
+    if table is not None:
+        text = text.replace("${TableName}", table.table_name)
+    return aws_appsync.MappingTemplate.from_string(text)
 
 
 class ApiLambdaS3SfnStack(Stack):
@@ -30,6 +48,7 @@ class ApiLambdaS3SfnStack(Stack):
         construct_id: str,
         sqs_queue: Queue,
         ecommerce_table: Table,
+        shared_layer: PythonLayerVersion,
         **kwargs,
     ) -> None:
         super().__init__(scope, construct_id, **kwargs)
@@ -47,6 +66,10 @@ class ApiLambdaS3SfnStack(Stack):
             versioned=False,
             encryption=s3.BucketEncryption.S3_MANAGED,
             block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            # Large workflow payloads are only needed while the workflow runs
+            lifecycle_rules=[
+                s3.LifecycleRule(prefix="claim-check/", expiration=Duration.days(7))
+            ],
         )
 
         # AppSync API
@@ -80,6 +103,10 @@ class ApiLambdaS3SfnStack(Stack):
             entry="./batch_upload_products",
             index="batch_upload_products.py",
             handler="handler",
+            layers=[shared_layer],
+            # Large NDJSON catalogs are streamed from S3 in one invocation
+            timeout=Duration.minutes(15),
+            memory_size=512,
         )
 
         create_stripe_products_lambda = PythonFunction(
@@ -89,15 +116,25 @@ class ApiLambdaS3SfnStack(Stack):
             entry="./create_stripe_products",
             index="create_stripe_products.py",
             handler="handler",
+            layers=[shared_layer],
+            # Long syncs resume on the next run, which diffs against Stripe again
+            timeout=Duration.minutes(15),
         )
 
         # Grant permissions
         ecommerce_table.grant_write_data(batch_upload_products_lambda)
-        ecommerce_table.grant_write_data(create_stripe_products_lambda)
+        batch_upload_products_lambda.add_environment(
+            "ECOMMERCE_TABLE_NAME", ecommerce_table.table_name
+        )
+        grocery_list_bucket.grant_read(batch_upload_products_lambda, "catalog/*")
+        ecommerce_table.grant_read_write_data(create_stripe_products_lambda)
         secret.grant_read(create_stripe_products_lambda)
         create_stripe_products_lambda.add_environment(
             "ECOMMERCE_TABLE_NAME", ecommerce_table.table_name
         )
+        create_stripe_products_lambda.add_environment(
+            "STRIPE_SECRET_NAME", secret.secret_name
+        )
 
         # create products in stripe lambda Function for Resolver
         trigger_step_function_products_lambda_function = PythonFunction(
@@ -107,6 +144,9 @@ class ApiLambdaS3SfnStack(Stack):
             entry="./step_functions_workflow_trigger",
             index="step_functions_workflow_trigger.py",
             handler="handler",
+            # Large photos are normalized before the workflow starts
+            timeout=Duration.minutes(1),
+            memory_size=1024,
         )
         # create products in stripe lambda Function for Resolver
         invoke_agent_lambda = PythonFunction(
@@ -118,6 +158,7 @@ class ApiLambdaS3SfnStack(Stack):
             handler="handler",
             timeout=Duration.minutes(2),
             memory_size=512,
+            layers=[shared_layer],
         )
         sqs_poller_lambda = PythonFunction(
             self,
@@ -127,6 +168,7 @@ class ApiLambdaS3SfnStack(Stack):
             index="lambda_sqs_poller.py",
             entry="./sqs_poller",
             timeout=Duration.seconds(30),
+            layers=[shared_layer],
         )
 
         # Step 11: Grant the second Lambda function permissions to poll the SQS queue
@@ -156,12 +198,18 @@ class ApiLambdaS3SfnStack(Stack):
                 # Grant access to all Bedrock models
             )
         )
-        ecommerce_table.grant_write_data(invoke_agent_lambda)
+        # The fast path resolves products and creates payment links itself
+        ecommerce_table.grant_read_write_data(invoke_agent_lambda)
+        secret.grant_read(invoke_agent_lambda)
+        invoke_agent_lambda.add_environment("STRIPE_SECRET_NAME", secret.secret_name)
 
         # Add Lambda as a DataSource for AppSync
         lambda_ds = api.add_lambda_data_source(
             "LambdaDataSource", batch_upload_products_lambda
         )
+        create_stripe_products_ds = api.add_lambda_data_source(
+            "CreateStripeProductsDataSource", create_stripe_products_lambda
+        )
 
         # Define None DataSource
         none_data_source = aws_appsync.CfnDataSource(
@@ -191,7 +239,7 @@ class ApiLambdaS3SfnStack(Stack):
                              "time": "$context.arguments.time",
                              "region": "$context.arguments.region",
                              "detailType": "$context.arguments.detailType",
-                             "data": "$context.arguments.data"
+                             "data": $util.toJson($context.arguments.data)
                          }
                        }
                    """,
@@ -201,17 +249,70 @@ class ApiLambdaS3SfnStack(Stack):
         # Ensure the resolver depends on the DataSource
         mutation_resolver.add_dependency(none_data_source)
 
-        # Define Resolvers
-        lambda_ds.create_resolver(
-            id="BatchUploadProductsResolver",
-            type_name="Mutation",
-            field_name="batchUploadProducts",
-            request_mapping_template=aws_appsync.MappingTemplate.lambda_request(),
-            response_mapping_template=aws_appsync.MappingTemplate.lambda_result(),
+        # Define Resolvers. Catalog runs outlast the AppSync timeout, so both
+        # mutations start them asynchronously and return a run id
+        for data_source, resolver_id, field_name in (
+            (lambda_ds, "BatchUploadProductsResolver", "batchUploadProducts"),
+            (
+                create_stripe_products_ds,
+                "CreateStripeProductsResolver",
+                "createStripeProducts",
+            ),
+        ):
+            data_source.create_resolver(
+                id=resolver_id,
+                type_name="Mutation",
+                field_name=field_name,
+                request_mapping_template=resolver_template("invokeAsync.request.vtl"),
+                response_mapping_template=resolver_template("invokeAsync.response.vtl"),
+            )
+
+        # Product reads resolve directly against the table, behind the API cache
+        api_cache = aws_appsync.CfnApiCache(
+            self,
+            "GroceryAppApiCache",
+            api_id=api.api_id,
+            api_caching_behavior="PER_RESOLVER_CACHING",
+            type="SMALL",
+            ttl=PRODUCT_CACHE_TTL.to_seconds(),
+            transit_encryption_enabled=True,
+            at_rest_encryption_enabled=True,
+        )
+        products_ds = api.add_dynamo_db_data_source(
+            "ProductsDataSource", ecommerce_table
         )
+        for field_name, caching_keys in (
+            ("getProduct", ["$context.arguments.id"]),
+            ("getProducts", ["$context.arguments.ids"]),
+            (
+                "listProducts",
+                [
+                    "$context.arguments.category",
+                    "$context.arguments.limit",
+                    "$context.arguments.nextToken",
+                ],
+            ),
+        ):
+            resolver = products_ds.create_resolver(
+                id=f"{field_name[0].upper()}{field_name[1:]}Resolver",
+                type_name="Query",
+                field_name=field_name,
+                request_mapping_template=resolver_template(
+                    f"{field_name}.request.vtl", ecommerce_table
+                ),
+                response_mapping_template=resolver_template(
+                    f"{field_name}.response.vtl", ecommerce_table
+                ),
+                caching_config=aws_appsync.CachingConfig(
+                    ttl=PRODUCT_CACHE_TTL, caching_keys=caching_keys
+                ),
+            )
+            resolver.node.add_dependency(api_cache)
 
         # Step 3: Grant the Lambda function permissions to read from the S3 bucket
-        grocery_list_bucket.grant_read(trigger_step_function_products_lambda_function)
+        grocery_list_bucket.grant_read_write(
+            trigger_step_function_products_lambda_function
+        )
         # Add an S3 event notification to trigger the Lambda function
 
         # Step 5: Add an S3 event trigger to invoke the Lambda function
@@ -229,6 +330,47 @@ class ApiLambdaS3SfnStack(Stack):
                 resources=["*"],  # Grant access to all Bedrock models
             )
         )
+        # Reads the text of finished asynchronous (PDF) text detection jobs
+        textract_results_lambda = PythonFunction(
+            self,
+            "TextractResults",
+            runtime=Runtime.PYTHON_3_11,
+            entry="./textract_results",
+            index="textract_results.py",
+            handler="handler",
+            timeout=Duration.minutes(2),
+            memory_size=256,
+            layers=[shared_layer],
+        )
+        textract_results_lambda.add_to_role_policy(
+            iam.PolicyStatement(
+                actions=[
+                    "textract:GetDocumentTextDetection",
+                    "textract:DetectDocumentText",
+                ],
+                resources=["*"],  # Textract does not support resource-level permissions
+            )
+        )
+
+        # Texts over CLAIM_CHECK_THRESHOLD_BYTES travel through the workflow as
+        # pointers to objects in the bucket (claim-check)
+        for function in (
+            textract_results_lambda,
+            sqs_poller_lambda,
+            invoke_agent_lambda,
+        ):
+            function.add_environment(
+                "CLAIM_CHECK_BUCKET", grocery_list_bucket.bucket_name
+            )
+        grocery_list_bucket.grant_read_write(textract_results_lambda)
+        grocery_list_bucket.grant_read_write(sqs_poller_lambda)
+        grocery_list_bucket.grant_read(invoke_agent_lambda)
+
+        # Extraction results are cached in the table, keyed by the OCR text
+        ecommerce_table.grant_read_write_data(sqs_poller_lambda)
+        sqs_poller_lambda.add_environment(
+            "ECOMMERCE_TABLE_NAME", ecommerce_table.table_name
+        )
 
         # Load the ASL definition from the JSON file
         with open("./state_machine/state_machine_definition.json", "r") as file:
@@ -241,6 +383,9 @@ class ApiLambdaS3SfnStack(Stack):
             definition_body=sfn.DefinitionBody.from_string(
                 json.dumps(state_machine_definition)
             ),
+            definition_substitutions={
+                "TextractResultsFunctionArn": textract_results_lambda.function_arn
+            },
             # Use definition_body
             state_machine_type=sfn.StateMachineType.STANDARD,
         )
@@ -248,9 +393,15 @@ class ApiLambdaS3SfnStack(Stack):
         # Grant the Lambda function permissions to send task success/failure
         state_machine.grant_task_response(sqs_poller_lambda)
         invoke_agent_lambda.grant_invoke(state_machine)
+        textract_results_lambda.grant_invoke(state_machine)
         invoke_agent_lambda.add_environment(
             "ECOMMERCE_TABLE_NAME", ecommerce_table.table_name
         )
+        # Stream agent completion chunks to subscribers through `publish`
+        invoke_agent_lambda.add_environment("APPSYNC_API_URL", api.graphql_url)
+        invoke_agent_lambda.add_environment("STREAM_COMPLETION", "true")
+        invoke_agent_lambda.add_environment("AGENT_TRACE_SAMPLE_RATE", "0.1")
+        api.grant_mutation(invoke_agent_lambda, "publish")
 
         trigger_step_function_products_lambda_function.add_environment(
             "STATE_MACHINE_ARN", state_machine.state_machine_arn
@@ -283,10 +434,16 @@ class ApiLambdaS3SfnStack(Stack):
         # Outputs
 
         # Step 11: Add an SQS event source mapping to trigger the Lambda function
-        sqs_event_source = lambda_event_sources.SqsEventSource(sqs_queue)
+        # The poller processes each batch concurrently and reports failed
+        # records individually instead of deleting messages itself
+        sqs_event_source = lambda_event_sources.SqsEventSource(
+            sqs_queue,
+            batch_size=10,
+            report_batch_item_failures=True,
+        )
         sqs_poller_lambda.add_event_source(sqs_event_source)
 
-        sqs_poller_lambda.add_environment("SQS_QUEUE_URL", sqs_queue.queue_url)
+        sqs_poller_lambda.add_environment("MAX_CONCURRENCY", "10")
 
         self.sqs_poller_lambda = sqs_poller_lambda
         self.invoke_agent_lambda = invoke_agent_lambda
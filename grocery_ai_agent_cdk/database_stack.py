@@ -18,6 +18,8 @@ class DatabaseStack(Stack):
             sort_key=dynamodb.Attribute(name="SK", type=dynamodb.AttributeType.STRING),
             billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
             stream=dynamodb.StreamViewType.NEW_IMAGE,
+            # Expiry of cache records (e.g. memoized payment links)
+            time_to_live_attribute="ttl",
         )
 
         # Add Global Secondary Indexes (GSIs)
@@ -43,5 +45,31 @@ class DatabaseStack(Stack):
             projection_type=dynamodb.ProjectionType.ALL,
         )
 
+        # Catalog lookups by normalized product name, used by the agent to
+        # resolve Stripe price ids without calling the Stripe list APIs
+        ecommerce_table.add_global_secondary_index(
+            index_name="productName",
+            partition_key=dynamodb.Attribute(
+                name="GSI3PK", type=dynamodb.AttributeType.STRING
+            ),
+            projection_type=dynamodb.ProjectionType.INCLUDE,
+            non_key_attributes=["stripeProductId", "stripePriceId"],
+        )
+
+        # Catalog listings by category, for the listProducts query.
+        # CloudFormation creates one GSI per table update: a stack deployed
+        # without productName must get that index in a deploy of its own
+        # first (see README, "Upgrading an existing deployment")
+        ecommerce_table.add_global_secondary_index(
+            index_name="productCategory",
+            partition_key=dynamodb.Attribute(
+                name="GSI4PK", type=dynamodb.AttributeType.STRING
+            ),
+            sort_key=dynamodb.Attribute(
+                name="GSI4SK", type=dynamodb.AttributeType.STRING
+            ),
+            projection_type=dynamodb.ProjectionType.ALL,
+        )
+
         # Output the table name for use in other stacks
         self.ecommerce_table = ecommerce_table
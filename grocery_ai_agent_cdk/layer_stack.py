@@ -0,0 +1,17 @@
+from aws_cdk import Stack
+from aws_cdk.aws_lambda import Runtime
+from aws_cdk.aws_lambda_python_alpha import PythonLayerVersion
+from constructs import Construct
+
+
+class LayerStack(Stack):
+    def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        # Code shared between the Lambda functions (secrets cache, ...)
+        self.shared_layer = PythonLayerVersion(
+            self,
+            "GrocerySharedLayer",
+            entry="./shared",
+            compatible_runtimes=[Runtime.PYTHON_3_11],
+        )
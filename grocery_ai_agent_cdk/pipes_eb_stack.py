@@ -1,3 +1,5 @@
+import json
+
 from aws_cdk import (
     Stack,
     aws_events as events,
@@ -71,6 +73,21 @@ class PipesAndEventbridgeStack(Stack):
                         arn=pipe_dlq.queue_arn,
                     ),
                 ),
+                # Only payment link records are events; catalog and cache
+                # records share the table but must not reach subscribers
+                filter_criteria=pipes.CfnPipe.FilterCriteriaProperty(
+                    filters=[
+                        pipes.CfnPipe.FilterProperty(
+                            pattern=json.dumps(
+                                {
+                                    "dynamodb": {
+                                        "NewImage": {"PK": {"S": ["PAYMENLINK"]}}
+                                    }
+                                }
+                            )
+                        )
+                    ]
+                ),
             ),
             target=event_bus.event_bus_arn,
             target_parameters=pipes.CfnPipe.PipeTargetParametersProperty(
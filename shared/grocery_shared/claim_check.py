@@ -0,0 +1,82 @@
+import hashlib
+import logging
+import os
+from typing import Optional
+
+CLAIM_CHECK_BUCKET = os.environ.get("CLAIM_CHECK_BUCKET")
+# Fields larger than this are stored in S3. Step Functions states and SQS
+# messages are capped at 256 KB, which also has to fit the task token and
+# the rest of the payload.
+CLAIM_CHECK_THRESHOLD_BYTES = int(
+    os.environ.get("CLAIM_CHECK_THRESHOLD_BYTES", str(64 * 1024))
+)
+CLAIM_CHECK_PREFIX = "claim-check/"
+
+logger = logging.getLogger(__name__)
+
+
+class ClaimCheck:
+    """
+    Claim-check for large text fields of workflow payloads.
+
+    `offload` replaces a text field above the threshold with a `<field>_ref`
+    pointer ({"bucket": ..., "key": ...}) to an S3 object holding the text,
+    and `resolve` returns the text of a payload either way, so consumers
+    don't need to know which form they received. Objects are keyed by the
+    hash of their text, so identical texts share one object.
+    """
+
+    def __init__(
+        self,
+        bucket: Optional[str] = CLAIM_CHECK_BUCKET,
+        threshold_bytes: int = CLAIM_CHECK_THRESHOLD_BYTES,
+        prefix: str = CLAIM_CHECK_PREFIX,
+    ):
+        self._bucket = bucket
+        self._threshold_bytes = threshold_bytes
+        self._prefix = prefix
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            import boto3
+
+            self._client = boto3.client("s3")
+        return self._client
+
+    def offload(self, payload: dict, field: str) -> dict:
+        """
+        Return `payload` with `field` moved to S3 if its text is over the
+        threshold, or unchanged otherwise (or when no bucket is configured).
+        """
+        data = payload[field].encode()
+        if len(data) <= self._threshold_bytes or not self._bucket:
+            return payload
+
+        key = f"{self._prefix}{hashlib.sha256(data).hexdigest()}.txt"
+        self._get_client().put_object(
+            Bucket=self._bucket, Key=key, Body=data, ContentType="text/plain"
+        )
+        logger.info(
+            f"Offloaded {len(data)} bytes of {field} to s3://{self._bucket}/{key}"
+        )
+        offloaded = {name: value for name, value in payload.items() if name != field}
+        offloaded[f"{field}_ref"] = {"bucket": self._bucket, "key": key}
+        return offloaded
+
+    def resolve(self, payload: dict, field: str) -> str:
+        """
+        Return the text of `field`, inline or read from its `<field>_ref`.
+
+        Raises:
+            KeyError: When the payload has neither form of the field.
+        """
+        if field in payload:
+            return payload[field]
+        ref = payload[f"{field}_ref"]
+        response = self._get_client().get_object(Bucket=ref["bucket"], Key=ref["key"])
+        return response["Body"].read().decode()
+
+
+# Shared by every caller in the container
+claim_check = ClaimCheck()
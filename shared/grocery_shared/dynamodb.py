@@ -0,0 +1,44 @@
+from time import time
+from typing import Optional
+
+# Time-to-live attribute of the table (see database_stack.py)
+TTL_ATTRIBUTE = "ttl"
+
+
+def create_dynamodb_client(max_pool_connections: int = 10):
+    """
+    Create a low-level DynamoDB client. Unlike boto3's resource layer, a
+    client is safe to share across threads, so one client and its
+    connection pool can serve every worker of a function; size the pool to
+    the number of workers. boto3 is imported here, on first use, to keep it
+    out of import paths that don't need it.
+    """
+    import boto3
+    from botocore.config import Config
+
+    return boto3.client(
+        "dynamodb", config=Config(max_pool_connections=max_pool_connections)
+    )
+
+
+def expires_at(ttl_seconds: int) -> int:
+    """
+    The TTL attribute value of an item that expires in `ttl_seconds`.
+    """
+    return int(time()) + ttl_seconds
+
+
+def unexpired(item: Optional[dict]) -> Optional[dict]:
+    """
+    Return a cache item, or None when it is missing or expired.
+
+    DynamoDB deletes expired items lazily, possibly days after they expire,
+    so reads check the TTL themselves. Items may come from the resource
+    layer (plain values) or from a low-level client ({"N": ...}).
+    """
+    if not item or TTL_ATTRIBUTE not in item:
+        return None
+    ttl = item[TTL_ATTRIBUTE]
+    if isinstance(ttl, dict):
+        ttl = ttl["N"]
+    return item if int(ttl) > time() else None
@@ -0,0 +1,35 @@
+import re
+
+# The grammar of grocery list lines, shared by the SQS poller's rule-based
+# extractor, the agent's fast-path parser (which reads the extractor's
+# "- name, quantity unit" output) and the receipt layout of TextractResults
+
+UNITS = (
+    r"(?:kg|kgs|g|grams?|lbs?|pounds?|oz|l|litres?|liters?|ml|"
+    r"packs?|packets?|boxes|box|bags?|bottles?|cans?|dozens?|pcs|pieces?|units?)"
+)
+
+# List bullets and numbering, e.g. "- ", "* ", "• ", "1. ", "2) "
+BULLET_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+
+# Typed list lines, e.g.
+#   "Tomatoes, 2 kg"   "Tomatoes: 2"   "2 kg tomatoes"   "Milk x3"
+# Each has "name", "quantity" and (except the last) "unit" groups.
+LIST_LINE_PATTERNS = (
+    re.compile(
+        rf"^(?P<name>[^\d,:][^,:]*?)\s*[,:]\s*(?P<quantity>\d+)\s*(?P<unit>{UNITS})?\.?$",
+        re.IGNORECASE,
+    ),
+    re.compile(
+        rf"^(?P<quantity>\d+)\s*(?:x\s+)?(?:(?P<unit>{UNITS})\s+(?:of\s+)?)?(?P<name>[^\d,:].*?)\.?$",
+        re.IGNORECASE,
+    ),
+    re.compile(
+        r"^(?P<name>[^\d,:].*?)\s*[x×]\s*(?P<quantity>\d+)\.?$",
+        re.IGNORECASE,
+    ),
+)
+
+
+def strip_bullet(line: str) -> str:
+    return BULLET_RE.sub("", line, count=1).strip()
@@ -0,0 +1,166 @@
+from decimal import Decimal
+from typing import Callable, Dict, List, Tuple
+
+
+def normalize_product_name(name: str) -> str:
+    """
+    Normalize a product name for lookups: lowercase and collapse whitespace.
+    """
+    return " ".join(name.lower().split())
+
+
+def product_name_key(name: str) -> str:
+    """
+    Partition key (GSI3PK) of a product in the `productName` index, written
+    by create_stripe_products and queried by the agent.
+    """
+    return f"PRODUCTNAME#{normalize_product_name(name)}"
+
+
+def _string(value) -> dict:
+    if type(value) is not str:
+        raise TypeError(f"Expected a string, got {value!r}")
+    return {"S": value}
+
+
+def _number(value) -> dict:
+    # like boto3's TypeSerializer: floats are rejected, use Decimal instead
+    if type(value) is not int and type(value) is not Decimal:
+        raise TypeError(f"Expected an int or Decimal, got {value!r}")
+    return {"N": str(value)}
+
+
+def _strings(values) -> dict:
+    return {"L": [_string(value) for value in values]}
+
+
+class Package:
+    """
+    Package dimensions and weight of a product.
+    """
+
+    __slots__ = ("height", "length", "weight", "width")
+
+    def __init__(self, height, length, weight, width):
+        self.height = height
+        self.length = length
+        self.weight = weight
+        self.width = width
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Package":
+        return cls(data["height"], data["length"], data["weight"], data["width"])
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def to_attribute_value(self) -> dict:
+        return {
+            "M": {
+                "height": _number(self.height),
+                "length": _number(self.length),
+                "weight": _number(self.weight),
+                "width": _number(self.width),
+            }
+        }
+
+
+class Product:
+    """
+    A catalog product, as listed in product_list.json and catalog NDJSON
+    files.
+
+    `to_item` encodes it straight to the low-level DynamoDB AttributeValue
+    format through a per-field encoder table built once, instead of boto3's
+    TypeSerializer inspecting the type of every value.
+    """
+
+    __slots__ = (
+        "productId",
+        "category",
+        "createdDate",
+        "description",
+        "modifiedDate",
+        "name",
+        "package",
+        "pictures",
+        "price",
+        "tags",
+    )
+
+    def __init__(
+        self,
+        productId: str,
+        category: str,
+        createdDate: str,
+        description: str,
+        modifiedDate: str,
+        name: str,
+        package: Package,
+        pictures: List[str],
+        price: int,
+        tags: List[str],
+    ):
+        self.productId = productId
+        self.category = category
+        self.createdDate = createdDate
+        self.description = description
+        self.modifiedDate = modifiedDate
+        self.name = name
+        self.package = package
+        self.pictures = pictures
+        self.price = price
+        self.tags = tags
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Product":
+        """
+        Raises:
+            KeyError: A field is missing.
+        """
+        return cls(
+            data["productId"],
+            data["category"],
+            data["createdDate"],
+            data["description"],
+            data["modifiedDate"],
+            data["name"],
+            Package.from_dict(data["package"]),
+            data["pictures"],
+            data["price"],
+            data["tags"],
+        )
+
+    def to_dict(self) -> dict:
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data["package"] = self.package.to_dict()
+        return data
+
+    def to_item(self, **keys: str) -> dict:
+        """
+        The product as a low-level DynamoDB item.
+
+        Args:
+            keys: String attributes to add, e.g. PK and SK.
+
+        Raises:
+            TypeError: A field has the wrong type (floats included).
+        """
+        item = {name: _string(value) for name, value in keys.items()}
+        for name, encode in _ENCODERS:
+            item[name] = encode(getattr(self, name))
+        return item
+
+
+_ENCODERS: Tuple[Tuple[str, Callable[..., Dict]], ...] = (
+    ("productId", _string),
+    ("category", _string),
+    ("createdDate", _string),
+    ("description", _string),
+    ("modifiedDate", _string),
+    ("name", _string),
+    ("package", Package.to_attribute_value),
+    ("pictures", _strings),
+    ("price", _number),
+    ("tags", _strings),
+)
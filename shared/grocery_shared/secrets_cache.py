@@ -0,0 +1,100 @@
+import json
+import logging
+import os
+import threading
+from time import monotonic
+from typing import Dict, NamedTuple, Optional
+
+SECRETS_CACHE_TTL_SECONDS = int(os.environ.get("SECRETS_CACHE_TTL_SECONDS", "300"))
+STRIPE_SECRET_NAME = os.environ.get("STRIPE_SECRET_NAME", "dev/stripe-secret")
+
+logger = logging.getLogger(__name__)
+
+
+class _CachedSecret(NamedTuple):
+    value: str
+    version_id: str
+    fetched_at: float
+
+
+class SecretsCache:
+    """
+    In-memory TTL cache in front of AWS Secrets Manager.
+
+    A secret is fetched at most once per `ttl_seconds` per container. When it
+    is fetched again its version id is compared with the cached one, so a
+    rotation is picked up (and logged) within one TTL window; callers that
+    notice a stale credential earlier can `invalidate` it.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = SECRETS_CACHE_TTL_SECONDS,
+        region_name: Optional[str] = None,
+    ):
+        self._ttl_seconds = ttl_seconds
+        self._region_name = region_name or os.environ.get("AWS_REGION")
+        self._client = None
+        self._secrets: Dict[str, _CachedSecret] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "rotations": 0}
+
+    def _get_client(self):
+        if self._client is None:
+            import boto3
+
+            self._client = boto3.client("secretsmanager", region_name=self._region_name)
+        return self._client
+
+    def get_secret_string(self, secret_id: str) -> str:
+        with self._lock:
+            cached = self._secrets.get(secret_id)
+            if (
+                cached is not None
+                and monotonic() - cached.fetched_at < self._ttl_seconds
+            ):
+                self.stats["hits"] += 1
+                return cached.value
+
+            self.stats["misses"] += 1
+            response = self._get_client().get_secret_value(SecretId=secret_id)
+            if cached is not None and cached.version_id != response["VersionId"]:
+                self.stats["rotations"] += 1
+                logger.info(
+                    f"Secret {secret_id} rotated to version {response['VersionId']}"
+                )
+            self._secrets[secret_id] = _CachedSecret(
+                response["SecretString"], response["VersionId"], monotonic()
+            )
+            return response["SecretString"]
+
+    def get_secret_json(self, secret_id: str) -> dict:
+        return json.loads(self.get_secret_string(secret_id))
+
+    def invalidate(self, secret_id: Optional[str] = None) -> None:
+        """
+        Drop one cached secret, or all of them, so the next read refetches it.
+        """
+        with self._lock:
+            if secret_id is None:
+                self._secrets.clear()
+            else:
+                self._secrets.pop(secret_id, None)
+
+
+# Shared by every caller in the container
+secrets_cache = SecretsCache()
+
+
+def get_stripe_key() -> str:
+    """
+    Fetch the Stripe secret key from AWS Secrets Manager through the cache.
+    The secret name comes from the STRIPE_SECRET_NAME environment variable.
+    """
+    try:
+        # e.g., '{"STRIPE_SECRET_KEY": "sk_test_123..."}'
+        secret_dict = secrets_cache.get_secret_json(STRIPE_SECRET_NAME)
+        return secret_dict.get("STRIPE_SECRET_KEY", "")
+    except Exception as e:
+        logger.error(f"Error retrieving Stripe secret key: {e}")
+        return ""
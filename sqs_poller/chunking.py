@@ -0,0 +1,105 @@
+import os
+import re
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Input budget of one extraction request, in estimated tokens
+EXTRACTION_CHUNK_TOKENS = int(os.environ.get("EXTRACTION_CHUNK_TOKENS", "1000"))
+# Lines per request, so that the extracted items fit the output token cap
+EXTRACTION_CHUNK_MAX_LINES = int(os.environ.get("EXTRACTION_CHUNK_MAX_LINES", "25"))
+
+NO_GROCERY_LIST = "No grocery list found."
+
+# "- Tomatoes, 2 kg" or "- Flour, 1.5 kg", as the extraction prompt asks for
+_MODEL_LINE_RE = re.compile(
+    r"^(?:[-*•]|\d+[.)])?\s*(?P<name>[^,]+?)\s*,\s*(?P<quantity>\d+(?:\.\d+)?)"
+    r"\s*(?P<unit>[^\d\s].*)?$"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English text, without loading a tokenizer
+    return len(text) // 4 + 1
+
+
+def split_into_chunks(
+    text: str,
+    max_tokens: int = EXTRACTION_CHUNK_TOKENS,
+    max_lines: int = EXTRACTION_CHUNK_MAX_LINES,
+) -> List[str]:
+    """
+    Split OCR text on line boundaries into chunks of at most `max_tokens`
+    estimated tokens and `max_lines` lines, so no item is cut in two. A
+    single line over the budget becomes a chunk of its own.
+    """
+    chunks: List[str] = []
+    lines: List[str] = []
+    tokens = 0
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        line_tokens = estimate_tokens(line)
+        if lines and (tokens + line_tokens > max_tokens or len(lines) >= max_lines):
+            chunks.append("\n".join(lines))
+            lines, tokens = [], 0
+        lines.append(line)
+        tokens += line_tokens
+    if lines:
+        chunks.append("\n".join(lines))
+    return chunks
+
+
+def parse_model_line(line: str) -> Optional[Tuple[str, Decimal, str]]:
+    """
+    Parse a "- name, quantity unit" line of the model's output into
+    (name, quantity, unit), or None for any other line.
+    """
+    match = _MODEL_LINE_RE.match(line)
+    if not match:
+        return None
+    return (
+        " ".join(match.group("name").split()),
+        Decimal(match.group("quantity")),
+        " ".join((match.group("unit") or "").lower().split()),
+    )
+
+
+def merge_grocery_lists(grocery_lists: Iterable[str]) -> str:
+    """
+    Merge the grocery lists extracted from the chunks of one document.
+
+    Items with the same name (case-insensitive) and unit are merged and their
+    quantities summed. Lines that don't parse as items are kept as they are,
+    and chunks without a grocery list are dropped.
+
+    Returns:
+        str: The merged list, or "No grocery list found." when no chunk had one.
+    """
+    merged: Dict[Tuple, list] = {}
+    for grocery_list in grocery_lists:
+        if NO_GROCERY_LIST in grocery_list:
+            continue
+        for line in grocery_list.splitlines():
+            line = line.strip()
+            if not line or line.endswith(":"):
+                continue
+            item = parse_model_line(line)
+            if item is None:
+                merged[("line", len(merged))] = [line]
+                continue
+            name, quantity, unit = item
+            key = ("item", name.lower(), unit)
+            if key in merged:
+                merged[key][1] += quantity
+            else:
+                merged[key] = [name, quantity, unit]
+    if not merged:
+        return NO_GROCERY_LIST
+    return "\n".join(
+        value[0] if len(value) == 1 else _format_line(*value)
+        for value in merged.values()
+    )
+
+
+def _format_line(name: str, quantity: Decimal, unit: str) -> str:
+    return f"- {name}, {quantity:f} {unit}".rstrip()
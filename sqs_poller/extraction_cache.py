@@ -0,0 +1,44 @@
+import hashlib
+import os
+from typing import Optional
+
+from grocery_shared.dynamodb import create_dynamodb_client, expires_at, unexpired
+
+table_name = os.environ.get("ECOMMERCE_TABLE_NAME")
+EXTRACTION_CACHE_TTL_SECONDS = int(
+    os.environ.get("EXTRACTION_CACHE_TTL_SECONDS", str(7 * 24 * 3600))
+)
+
+dynamodb_client = create_dynamodb_client(int(os.environ.get("MAX_CONCURRENCY", "10")))
+
+
+def text_key(text: str) -> str:
+    """
+    Cache key of an OCR text: the hash of its case and whitespace normalized
+    form, so re-uploads of the same list hit the same entry.
+    """
+    normalized = " ".join(text.lower().split())
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def get_cached_extraction(key: str) -> Optional[str]:
+    response = dynamodb_client.get_item(
+        TableName=table_name,
+        Key={"PK": {"S": f"EXTRACTION#{key}"}, "SK": {"S": "EXTRACTION"}},
+    )
+    item = unexpired(response.get("Item"))
+    if item is None:
+        return None
+    return item["groceryList"]["S"]
+
+
+def cache_extraction(key: str, grocery_list: str) -> None:
+    dynamodb_client.put_item(
+        TableName=table_name,
+        Item={
+            "PK": {"S": f"EXTRACTION#{key}"},
+            "SK": {"S": "EXTRACTION"},
+            "groceryList": {"S": grocery_list},
+            "ttl": {"N": str(expires_at(EXTRACTION_CACHE_TTL_SECONDS))},
+        },
+    )
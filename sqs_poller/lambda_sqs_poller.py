@@ -1,95 +1,192 @@
 import json
 import boto3
 import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from botocore.config import Config
 from aws_lambda_powertools import Logger
 from aws_lambda_powertools.utilities.data_classes import event_source, SQSEvent
+from aws_lambda_powertools.utilities.data_classes.sqs_event import SQSRecord
+from grocery_shared.claim_check import claim_check
+from chunking import merge_grocery_lists, split_into_chunks
+from extraction_cache import cache_extraction, get_cached_extraction, text_key
+from rule_extractor import extract_confident
 
-# Initialize AWS clients
-sqs_client = boto3.client("sqs")
-bedrock_client = boto3.client("bedrock-runtime")
-stepfunctions_client = boto3.client("stepfunctions")  # Step Functions client
+# Records of a batch processed at the same time
+MAX_CONCURRENCY = int(os.environ.get("MAX_CONCURRENCY", "10"))
+# Must match the queue's redrive policy: the last attempt fails the workflow
+MAX_RECEIVE_COUNT = int(os.environ.get("MAX_RECEIVE_COUNT", "3"))
+# Chunks of long documents extracted at the same time, across all records
+MAX_CHUNK_CONCURRENCY = int(os.environ.get("MAX_CHUNK_CONCURRENCY", "4"))
+# Output cap of one extraction request
+EXTRACTION_MAX_TOKENS = int(os.environ.get("EXTRACTION_MAX_TOKENS", "300"))
 
-# Get the SQS queue URL from environment variables
-sqs_queue_url = os.environ["SQS_QUEUE_URL"]
+# Initialize AWS clients, pooled for concurrent use across threads
+client_config = Config(max_pool_connections=MAX_CONCURRENCY)
+bedrock_client = boto3.client(
+    "bedrock-runtime",
+    config=Config(max_pool_connections=MAX_CONCURRENCY + MAX_CHUNK_CONCURRENCY),
+)
+stepfunctions_client = boto3.client(
+    "stepfunctions", config=client_config
+)  # Step Functions client
 
 logger = Logger(service="sqs_poller")
 
+# Shared by all records so a batch of long documents can't multiply the
+# number of concurrent model calls
+chunk_executor = ThreadPoolExecutor(max_workers=MAX_CHUNK_CONCURRENCY)
 
-@event_source(data_class=SQSEvent)
-@logger.inject_lambda_context(log_event=True)
-def handler(event: SQSEvent, context):
-    # Log the event for debugging
-    logger.info(f"Received event: {event}")
 
-    for record in event.records:  # Ensure we handle multiple SQS messages
-        try:
-            logger.info(f"Processing record: {record}")
-            event_body = json.loads(record.body)
-            logger.info(f"Received event body: {event_body}")
-
-            # Extract the input data
-            input_text = event_body["input"]["text"]
-            task_token = event_body["taskToken"]
-            logger.info(f"Extracted Data - Text: {input_text}, TaskToken: {task_token}")
-
-            # Use the Bedrock foundation model to process the text
-            prompt = f"""You are a helpful assistant that extracts grocery items alongside their quantities and unit from text.
-            If the text contains a grocery list, respond with ONLY the list of items alongside their quantity and unit in this format:
-            - Item 1, kg
-            - Item 2, kg
-            - Item 3, kg
-
-            If the text does NOT contain a grocery list, respond with: "No grocery list found."
-
-            Here is the text:
-            {input_text}"""
-
-            # Call the Bedrock AI model
-            response = bedrock_client.invoke_model(
-                modelId="anthropic.claude-3-5-sonnet-20240620-v1:0",
-                body=json.dumps(
-                    {
-                        "messages": [{"role": "user", "content": prompt}],
-                        "max_tokens": 300,
-                        "temperature": 0.7,
-                        "top_p": 0.9,
-                        "anthropic_version": "bedrock-2023-05-31",
-                    }
-                ),
-            )
+def invoke_extraction_model(input_text: str) -> str:
+    """
+    Ask the Bedrock model to extract the grocery list from an OCR text.
+    """
+    # Use the Bedrock foundation model to process the text
+    prompt = f"""You are a helpful assistant that extracts grocery items alongside their quantities and unit from text.
+    If the text contains a grocery list, respond with ONLY the list of items alongside their quantity and unit in this format:
+    - Item 1, kg
+    - Item 2, kg
+    - Item 3, kg
+
+    If the text does NOT contain a grocery list, respond with: "No grocery list found."
+
+    Here is the text:
+    {input_text}"""
+
+    # Call the Bedrock AI model
+    response = bedrock_client.invoke_model(
+        modelId="anthropic.claude-3-5-sonnet-20240620-v1:0",
+        body=json.dumps(
+            {
+                "messages": [{"role": "user", "content": prompt}],
+                "max_tokens": EXTRACTION_MAX_TOKENS,
+                "temperature": 0.7,
+                "top_p": 0.9,
+                "anthropic_version": "bedrock-2023-05-31",
+            }
+        ),
+    )
+
+    # Parse the response from Bedrock
+    response_body = json.loads(response["body"].read())
+    manipulated_text = response_body.get("content", [{}])[0].get("text", "")
+    return manipulated_text
+
+
+def extract_grocery_list(input_text: str) -> str:
+    """
+    Extract the grocery list of an OCR text with the model. Long texts are
+    split on line boundaries and their chunks extracted concurrently, then
+    merged, so the output cap never truncates the list.
+    """
+    chunks = split_into_chunks(input_text)
+    if len(chunks) <= 1:
+        return invoke_extraction_model(input_text)
+
+    logger.info(f"Extracting {len(chunks)} chunks concurrently")
+    return merge_grocery_lists(chunk_executor.map(invoke_extraction_model, chunks))
+
+
+def read_cache(key: str) -> Optional[str]:
+    try:
+        return get_cached_extraction(key)
+    except Exception as e:
+        # the cache is an optimization; fall back to the model
+        logger.warning(f"Failed to read extraction cache: {e}")
+        return None
+
+
+def write_cache(key: str, grocery_list: str) -> None:
+    try:
+        cache_extraction(key, grocery_list)
+    except Exception as e:
+        logger.warning(f"Failed to write extraction cache: {e}")
 
-            # Parse the response from Bedrock
-            response_body = json.loads(response["body"].read())
-            manipulated_text = response_body.get("content", [{}])[0].get("text", "")
-
-            # Log and process response
-            if "No grocery list found." in manipulated_text:
-                logger.info("No grocery list found in the extracted text.")
-                # Send task failure to Step Functions
-                stepfunctions_client.send_task_failure(
-                    taskToken=task_token,
-                    error="NoGroceryListFound",
-                    cause="The input text does not contain a grocery list.",
-                )
-            else:
-                logger.info(f"Grocery List:\n{manipulated_text}")
-                # Send task success to Step Functions
-                stepfunctions_client.send_task_success(
-                    taskToken=task_token,
-                    output=json.dumps(
-                        {"status": "SUCCESS", "grocery_list": manipulated_text}
-                    ),
-                )
-
-            # Delete the processed message from the queue
-            receipt_handle = record.receipt_handle
-            sqs_client.delete_message(
-                QueueUrl=sqs_queue_url, ReceiptHandle=receipt_handle
-            )
 
-        except Exception as e:
-            logger.error(f"Error processing SQS message: {str(e)}")
+def process_record(record: SQSRecord) -> None:
+    task_token = None
+    try:
+        logger.info(f"Processing record: {record.message_id}")
+        event_body = json.loads(record.body)
+        logger.info(f"Received event body: {event_body}")
+
+        # Extract the input data
+        input_text = claim_check.resolve(event_body["input"], "text")
+        task_token = event_body["taskToken"]
+        logger.info(f"Extracted Data - Text: {input_text}, TaskToken: {task_token}")
+
+        # Already structured lists are extracted without the model, then an
+        # identical text's cached extraction is reused, if any
+        cache_key = text_key(input_text)
+        manipulated_text = extract_confident(input_text)
+        if manipulated_text is not None:
+            logger.info("Extracted grocery list with rules")
+        elif (manipulated_text := read_cache(cache_key)) is not None:
+            logger.info(f"Extraction cache hit for {cache_key}")
+        else:
+            manipulated_text = extract_grocery_list(input_text)
+            if "No grocery list found." not in manipulated_text:
+                write_cache(cache_key, manipulated_text)
+
+        # Log and process response
+        if "No grocery list found." in manipulated_text:
+            logger.info("No grocery list found in the extracted text.")
             # Send task failure to Step Functions
+            stepfunctions_client.send_task_failure(
+                taskToken=task_token,
+                error="NoGroceryListFound",
+                cause="The input text does not contain a grocery list.",
+            )
+        else:
+            logger.info(f"Grocery List:\n{manipulated_text}")
+            # Send task success to Step Functions
+            stepfunctions_client.send_task_success(
+                taskToken=task_token,
+                output=json.dumps(
+                    claim_check.offload(
+                        {"status": "SUCCESS", "grocery_list": manipulated_text},
+                        "grocery_list",
+                    )
+                ),
+            )
+
+    except Exception as e:
+        logger.error(f"Error processing SQS message {record.message_id}: {str(e)}")
+        # The message is retried by SQS; only its last attempt fails the
+        # workflow, which would otherwise wait for a task token forever
+        receive_count = int(record.attributes.approximate_receive_count or 1)
+        if task_token and receive_count >= MAX_RECEIVE_COUNT:
             stepfunctions_client.send_task_failure(
                 taskToken=task_token, error="ProcessingError", cause=str(e)
             )
+        raise
+
+
+@event_source(data_class=SQSEvent)
+@logger.inject_lambda_context(log_event=True)
+def handler(event: SQSEvent, context):
+    """
+    Process the records of a batch concurrently and report the failed ones
+    as a partial batch response, so SQS deletes the successful messages and
+    only redelivers the failures.
+    """
+    records = list(event.records)
+
+    def run(record: SQSRecord):
+        try:
+            process_record(record)
+            return None
+        except Exception:
+            return record.message_id
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(len(records), MAX_CONCURRENCY))
+    ) as executor:
+        failed = [message_id for message_id in executor.map(run, records) if message_id]
+
+    if failed:
+        logger.warning(f"{len(failed)} of {len(records)} records failed")
+    return {
+        "batchItemFailures": [{"itemIdentifier": message_id} for message_id in failed]
+    }
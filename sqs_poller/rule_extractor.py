@@ -0,0 +1,124 @@
+import os
+import re
+from typing import List, NamedTuple, Optional
+
+from grocery_shared.grocery_grammar import LIST_LINE_PATTERNS, UNITS, strip_bullet
+
+# Lowest confidence at which the rule-based result is used instead of the model
+RULE_EXTRACTOR_MIN_CONFIDENCE = float(
+    os.environ.get("RULE_EXTRACTOR_MIN_CONFIDENCE", "1.0")
+)
+
+# The typed list lines of grocery_grammar, e.g.
+#   "Tomatoes, 2 kg"   "Tomatoes: 2"   "2 kg tomatoes"   "Milk x3"
+# plus "Eggs 12" and the "item | qty | unit" rows of receipts laid out by
+# TextractResults
+_LINE_PATTERNS = (
+    re.compile(
+        rf"^(?P<name>[^|\d][^|]*?)\s*\|\s*(?P<quantity>\d+)(?:\s*\|\s*(?P<unit>{UNITS}))?$",
+        re.IGNORECASE,
+    ),
+    *LIST_LINE_PATTERNS,
+    re.compile(
+        rf"^(?P<name>[^\d,:].*?)\s+(?P<quantity>\d+)\s*(?P<unit>{UNITS})?\.?$",
+        re.IGNORECASE,
+    ),
+)
+_HEADER_RE = re.compile(
+    r"^(?:my\s+)?(?:grocery|groceries|shopping|to\s+buy)(?:\s+list)?\s*:?$|:$",
+    re.IGNORECASE,
+)
+# A plausible product name: letters, spaces and a little punctuation. Digits
+# inside a name are usually OCR noise ("fl0ur")
+_NAME_RE = re.compile(r"^[^\W\d_](?:[^\W\d_]|[ '&().-])*$")
+# Words of notes and reminders that look like "name quantity" lines, e.g.
+# "Call mom at 5" or "Dentist tuesday 10"
+_NON_PRODUCT_WORDS = frozenset(
+    "at on by to am pm call meet meeting today tomorrow monday tuesday "
+    "wednesday thursday friday saturday sunday".split()
+)
+
+
+class ExtractedItem(NamedTuple):
+    name: str
+    quantity: int
+    unit: Optional[str]
+
+
+def format_item(item: ExtractedItem) -> str:
+    """
+    Format an item like the extraction model does: "- name, quantity unit".
+    """
+    if item.unit:
+        return f"- {item.name}, {item.quantity} {item.unit}"
+    return f"- {item.name}, {item.quantity}"
+
+
+class RuleExtraction(NamedTuple):
+    items: List[ExtractedItem]
+    # Share of the list lines (headers and blank lines excluded) that parsed
+    # into a plausible item, between 0 and 1
+    confidence: float
+
+    def to_grocery_list(self) -> str:
+        return "\n".join(format_item(item) for item in self.items)
+
+
+def parse_line(line: str) -> Optional[ExtractedItem]:
+    """
+    Parse one typed list line, or return None if it isn't a clean
+    name/quantity/unit line.
+    """
+    line = strip_bullet(line)
+    for pattern in _LINE_PATTERNS:
+        match = pattern.match(line)
+        if match:
+            name = " ".join(match.group("name").split())
+            quantity = int(match.group("quantity"))
+            if (
+                quantity <= 0
+                or not _NAME_RE.match(name)
+                or not _NON_PRODUCT_WORDS.isdisjoint(name.lower().split())
+            ):
+                return None
+            unit = match.groupdict().get("unit")
+            return ExtractedItem(name, quantity, unit.lower() if unit else None)
+    return None
+
+
+def extract(text: str) -> RuleExtraction:
+    """
+    Extract grocery items from OCR text without the model.
+
+    Args:
+        text: The Textract lines, joined with newlines.
+
+    Returns:
+        RuleExtraction: The parsed items and the confidence that they are the
+        complete list. Free-form text scores low.
+    """
+    items: List[ExtractedItem] = []
+    lines = 0
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or _HEADER_RE.search(line):
+            continue
+        lines += 1
+        item = parse_line(line)
+        if item is not None:
+            items.append(item)
+    confidence = len(items) / lines if lines else 0.0
+    return RuleExtraction(items, confidence)
+
+
+def extract_confident(
+    text: str, min_confidence: float = RULE_EXTRACTOR_MIN_CONFIDENCE
+) -> Optional[str]:
+    """
+    Return the grocery list of an already structured text, or None when the
+    text needs the model.
+    """
+    result = extract(text)
+    if not result.items or result.confidence < min_confidence:
+        return None
+    return result.to_grocery_list()
@@ -0,0 +1,62 @@
+import os
+from io import BytesIO
+from typing import Tuple
+
+from PIL import Image, ImageOps
+
+# Normalized copies are written under this prefix; the trigger skips it
+NORMALIZED_PREFIX = "normalized/"
+# Resolution Textract reads a letter/A4 sized list at, applied to the long side
+NORMALIZE_TARGET_DPI = int(os.environ.get("NORMALIZE_TARGET_DPI", "200"))
+NORMALIZE_PAGE_INCHES = float(os.environ.get("NORMALIZE_PAGE_INCHES", "11"))
+# Smaller uploads go to Textract as they are
+NORMALIZE_MIN_BYTES = int(os.environ.get("NORMALIZE_MIN_BYTES", str(1024 * 1024)))
+NORMALIZE_JPEG_QUALITY = int(os.environ.get("NORMALIZE_JPEG_QUALITY", "85"))
+
+MAX_SIDE = round(NORMALIZE_TARGET_DPI * NORMALIZE_PAGE_INCHES)
+
+
+def normalized_key(object_key: str) -> str:
+    stem = object_key.rsplit(".", 1)[0]
+    return f"{NORMALIZED_PREFIX}{stem}.jpg"
+
+
+def normalize_image(data: bytes, max_side: int = MAX_SIDE) -> Tuple[bytes, Tuple]:
+    """
+    Prepare a photo for text detection: apply its EXIF orientation, convert
+    it to grayscale, fit its long side in `max_side` pixels and recompress
+    it as JPEG.
+
+    JPEGs are decoded directly at the smallest power-of-two scale that still
+    covers the target size (Pillow's draft mode), which skips most of the
+    decoding work and memory for large phone photos.
+
+    Returns:
+        The JPEG bytes and the (width, height) of the normalized image.
+    """
+    with Image.open(BytesIO(data)) as image:
+        ratio = max_side / max(image.size)
+        if ratio < 1:
+            image.draft("L", (round(image.width * ratio), round(image.height * ratio)))
+        image = ImageOps.exif_transpose(image).convert("L")
+        image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+        output = BytesIO()
+        image.save(output, "JPEG", quality=NORMALIZE_JPEG_QUALITY, optimize=True)
+        return output.getvalue(), image.size
+
+
+def normalize_object(s3_client, bucket_name: str, object_key: str) -> Tuple[str, int]:
+    """
+    Write the normalized copy of an uploaded image next to it, under the
+    "normalized/" prefix.
+
+    Returns:
+        The key and size in bytes of the normalized copy.
+    """
+    response = s3_client.get_object(Bucket=bucket_name, Key=object_key)
+    data, _ = normalize_image(response["Body"].read())
+    key = normalized_key(object_key)
+    s3_client.put_object(
+        Bucket=bucket_name, Key=key, Body=data, ContentType="image/jpeg"
+    )
+    return key, len(data)
@@ -1,16 +1,36 @@
+import hashlib
 import json
 import boto3
 import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 from urllib.parse import unquote_plus
+from botocore.config import Config
 from aws_lambda_powertools import Logger
 from aws_lambda_powertools.utilities.data_classes import event_source, S3Event
+from aws_lambda_powertools.utilities.data_classes.s3_event import S3EventRecord
+from image_normalizer import NORMALIZE_MIN_BYTES, NORMALIZED_PREFIX, normalize_object
 
-# Initialize clients
-textract = boto3.client("textract", region_name="us-east-1")
-s3_client = boto3.client("s3", region_name="us-east-1")
-sqs_client = boto3.client("sqs", region_name="us-east-1")
+# Executions started at the same time
+MAX_CONCURRENCY = int(os.environ.get("MAX_CONCURRENCY", "16"))
+
+# Allowed file extensions
+ALLOWED_EXTENSIONS = (".pdf", ".png", ".jpg", ".jpeg")
+IMAGE_EXTENSIONS = ("png", "jpg", "jpeg")
+
+# Initialize clients, pooled for concurrent use across threads
+s3_client = boto3.client(
+    "s3",
+    region_name="us-east-1",
+    config=Config(max_pool_connections=MAX_CONCURRENCY),
+)
 stepfunctions_client = boto3.client(
-    "stepfunctions", region_name="us-east-1"
+    "stepfunctions",
+    region_name="us-east-1",
+    config=Config(
+        max_pool_connections=MAX_CONCURRENCY,
+        retries={"max_attempts": 5, "mode": "adaptive"},
+    ),
 )  # Step Functions client
 
 # Get the Step Functions state machine ARN from environment variables
@@ -19,46 +39,134 @@ state_machine_arn = os.environ["STATE_MACHINE_ARN"]
 logger = Logger()
 
 
-@event_source(data_class=S3Event)
-@logger.inject_lambda_context(log_event=True)
-def handler(event: S3Event, context):
-    logger.info(f"Received S3 event: {event}")
+def skip_reason(object_key: str) -> Optional[str]:
+    if object_key.startswith(NORMALIZED_PREFIX):
+        # written by this function, already being processed
+        return "Normalized copy"
+    if not object_key.lower().endswith(ALLOWED_EXTENSIONS):
+        return "Unsupported file type"
+    return None
+
+
+def build_input(record: S3EventRecord) -> dict:
+    """
+    Build the workflow input of an S3 record.
+    """
+    bucket_name = record.s3.bucket.name
+    object_key = unquote_plus(record.s3.get_object.key)
+    return {
+        "bucket_name": bucket_name,
+        "file_extension": object_key.split(".")[-1].lower(),
+        "object_key": object_key,
+        # sizes the first wait for asynchronous text detection
+        "object_size": record.s3.get_object.size,
+    }
 
-    for record in event.records:
-        logger.info(f"Record: {record}")
-        bucket_name = record.s3.bucket.name
-        object_key = unquote_plus(record.s3.get_object.key)
 
-        # Allowed file extensions
-        allowed_extensions = (".pdf", ".png", ".jpg", ".jpeg")
+def execution_name(record: S3EventRecord) -> str:
+    """
+    Execution name unique to an object version, so a redelivered S3 event
+    doesn't start a second workflow for the same upload.
+    """
+    s3_object = record.s3.get_object
+    identity = f"{record.s3.bucket.name}/{s3_object.key}/{s3_object.sequencer}"
+    return hashlib.sha256(identity.encode()).hexdigest()[:64]
 
-        logger.info(f"Processing file from bucket: {bucket_name}, key: {object_key}")
 
-        # Get the file type
-        file_extension = object_key.split(".")[-1].lower()
+def normalize_input(stepfunctions_input: dict) -> dict:
+    """
+    Point the workflow at a normalized copy of large images (downscaled,
+    grayscale, auto-oriented JPEG), or return the input unchanged.
+    """
+    if (
+        stepfunctions_input["file_extension"] not in IMAGE_EXTENSIONS
+        or stepfunctions_input["object_size"] < NORMALIZE_MIN_BYTES
+    ):
+        return stepfunctions_input
+    try:
+        key, size = normalize_object(
+            s3_client,
+            stepfunctions_input["bucket_name"],
+            stepfunctions_input["object_key"],
+        )
+    except Exception as e:
+        # Textract can still read the original
+        logger.warning(f"Failed to normalize {stepfunctions_input['object_key']}: {e}")
+        return stepfunctions_input
+    logger.info(
+        f"Normalized {stepfunctions_input['object_key']} from "
+        f"{stepfunctions_input['object_size']} to {size} bytes"
+    )
+    return {
+        **stepfunctions_input,
+        "file_extension": "jpg",
+        "object_key": key,
+        "object_size": size,
+        "source_key": stepfunctions_input["object_key"],
+    }
 
-        # Check if the file has an allowed extension
-        if not object_key.lower().endswith(allowed_extensions):
-            logger.info(f"Skipping file: {object_key} (Not a supported format)")
-            return {"statusCode": 400, "body": "Unsupported file type"}
 
-        # Prepare the input for the Step Functions workflow
-        stepfunctions_input = {
-            "bucket_name": bucket_name,
-            "file_extension": file_extension,
-            "object_key": object_key,
-        }
+def start_execution(name: str, stepfunctions_input: dict) -> dict:
+    result = {"object_key": stepfunctions_input["object_key"]}
+    stepfunctions_input = normalize_input(stepfunctions_input)
+    try:
+        response = stepfunctions_client.start_execution(
+            stateMachineArn=state_machine_arn,
+            name=name,
+            input=json.dumps(stepfunctions_input),
+        )
+        logger.info(f"Started Step Functions execution: {response['executionArn']}")
+        result.update(status="STARTED", execution_arn=response["executionArn"])
+    except stepfunctions_client.exceptions.ExecutionAlreadyExists:
+        logger.info(f"Execution {name} already exists")
+        result.update(status="DUPLICATE")
+    except Exception as e:
+        logger.error(f"Failed to start Step Functions execution: {str(e)}")
+        result.update(status="FAILED", error=str(e))
+    return result
 
-        logger.info("stepfunctions input is: " + str(stepfunctions_input))
 
-        # Start the Step Functions workflow
-        try:
-            response = stepfunctions_client.start_execution(
-                stateMachineArn=state_machine_arn, input=json.dumps(stepfunctions_input)
+@event_source(data_class=S3Event)
+@logger.inject_lambda_context(log_event=True)
+def handler(event: S3Event, context):
+    """
+    Start one workflow per supported object of the S3 event.
+
+    Every record is validated before any execution starts, unsupported files
+    are skipped without dropping the records after them, and the executions
+    are started concurrently, after normalizing large images.
+
+    Returns:
+        dict: Counts per status and the result of every record. Raises after
+        all records are processed if any execution failed to start, so the
+        event is retried; already started executions are not duplicated.
+    """
+    results = []
+    to_start = []
+    for record in event.records:
+        object_key = unquote_plus(record.s3.get_object.key)
+        reason = skip_reason(object_key)
+        if reason is not None:
+            logger.info(f"Skipping file: {object_key} ({reason})")
+            results.append(
+                {"object_key": object_key, "status": "SKIPPED", "error": reason}
             )
-            logger.info(f"Started Step Functions execution: {response['executionArn']}")
-        except Exception as e:
-            logger.error(f"Failed to start Step Functions execution: {str(e)}")
-            raise e
+        else:
+            to_start.append((execution_name(record), build_input(record)))
+
+    if to_start:
+        with ThreadPoolExecutor(
+            max_workers=min(len(to_start), MAX_CONCURRENCY)
+        ) as executor:
+            results.extend(executor.map(lambda args: start_execution(*args), to_start))
+
+    summary = {}
+    for result in results:
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
+    logger.info(f"Processed {len(results)} records: {summary}")
 
-    return "Successfully started the Step Functions workflow"
+    if summary.get("FAILED"):
+        raise RuntimeError(
+            f"Failed to start {summary['FAILED']} of {len(results)} executions"
+        )
+    return {"summary": summary, "results": results}
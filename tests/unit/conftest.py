@@ -0,0 +1,46 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+SHARED = os.path.join(ROOT, "shared")
+TESTS = os.path.join(ROOT, "tests")
+
+# Lambda modules create their AWS clients at import time
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("POWERTOOLS_LOG_LEVEL", "WARNING")
+
+if SHARED not in sys.path:
+    sys.path.insert(0, SHARED)
+
+
+def _is_lambda_module(module) -> bool:
+    path = getattr(module, "__file__", None) or ""
+    return path.startswith(ROOT) and not path.startswith((SHARED, TESTS))
+
+
+@pytest.fixture(scope="session")
+def load_lambda_module():
+    """
+    Import a module of a Lambda as its runtime does, with the Lambda's entry
+    directory and the shared layer on the path.
+
+    Lambdas have same-named top-level packages (e.g. `utilities`), so modules
+    of previously loaded Lambdas are dropped from the module cache first;
+    modules already returned keep working.
+    """
+
+    def load(entry: str, name: str):
+        for module_name, module in list(sys.modules.items()):
+            if _is_lambda_module(module):
+                del sys.modules[module_name]
+        path = os.path.join(ROOT, entry)
+        sys.path.insert(0, path)
+        try:
+            return importlib.import_module(name)
+        finally:
+            sys.path.remove(path)
+
+    return load
@@ -0,0 +1,66 @@
+import sys
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def utils(load_lambda_module):
+    return load_lambda_module("agent", "utilities.utils")
+
+
+RAW = [
+    "[{name=Fresh Smoothies",
+    " quantity=2}",
+    " {name=Salt, pepper and herbs",
+    " quantity=1",
+    " unit=kg}",
+    " {name=Pineapples",
+    " quantity=5}]",
+]
+
+
+def test_iter_raw_items_tokenizes_agent_fragments(utils):
+    assert list(utils.iter_raw_items(RAW)) == [
+        ("Fresh Smoothies", 2, None),
+        ("Salt, pepper and herbs", 1, "kg"),
+        ("Pineapples", 5, None),
+    ]
+
+
+def test_iter_raw_items_skips_groups_without_quantity(utils):
+    assert list(
+        utils.iter_raw_items(["[{name=Milk}", " {name=Eggs", " quantity=12}]"])
+    ) == [("Eggs", 12, None)]
+
+
+def test_parse_raw_items_validates_at_the_boundary(utils):
+    items = utils.parse_raw_items(RAW).products
+
+    assert [(item.name, item.quantity, item.unit) for item in items] == list(
+        utils.iter_raw_items(RAW)
+    )
+
+
+@pytest.mark.parametrize(
+    "raw",
+    [[], ["[{name=Milk", " quantity=0}]"], ["[{name=", " quantity=2}]"]],
+)
+def test_parse_raw_items_rejects_invalid_products(utils, raw):
+    with pytest.raises(ValueError):
+        utils.parse_raw_items(raw)
+
+
+def test_tokenizing_does_not_import_pydantic(load_lambda_module):
+    pydantic_modules = {
+        name: module
+        for name, module in sys.modules.items()
+        if name.split(".")[0] in ("pydantic", "pydantic_core")
+    }
+    for name in pydantic_modules:
+        del sys.modules[name]
+    try:
+        utils = load_lambda_module("agent", "utilities.utils")
+        list(utils.iter_raw_items(RAW))
+        assert "pydantic" not in sys.modules
+    finally:
+        sys.modules.update(pydantic_modules)
@@ -0,0 +1,56 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def appsync_publisher(load_lambda_module):
+    return load_lambda_module("agent", "utilities.appsync_publisher")
+
+
+class FakeHttp:
+    def __init__(self, status, body):
+        self.response = SimpleNamespace(status=status, data=body.encode())
+        self.requests = []
+
+    def request(self, method, url, body, headers):
+        self.requests.append(json.loads(body))
+        return self.response
+
+
+@pytest.fixture
+def make_publisher(appsync_publisher, monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+
+    def make(status, body):
+        publisher = appsync_publisher.AppSyncPublisher("https://example.com/graphql")
+        publisher._http = FakeHttp(status, body)
+        return publisher
+
+    return make
+
+
+def test_publishes_data_as_a_json_string(make_publisher):
+    publisher = make_publisher(200, '{"data": {"publish": {"id": "s#0"}}}')
+
+    result = publisher.publish("progress", "s#0", {"chunk": 'say "hi"'})
+
+    assert result == {"data": {"publish": {"id": "s#0"}}}
+    variables = publisher._http.requests[0]["variables"]
+    assert json.loads(variables["data"]) == {"chunk": 'say "hi"'}
+
+
+def test_raises_on_graphql_errors(appsync_publisher, make_publisher):
+    publisher = make_publisher(200, '{"data": null, "errors": [{"message": "bad"}]}')
+
+    with pytest.raises(appsync_publisher.AppSyncPublishError, match="bad"):
+        publisher.publish("progress", "s#0", {})
+
+
+def test_raises_on_http_errors(appsync_publisher, make_publisher):
+    publisher = make_publisher(403, "<html>Forbidden</html>")
+
+    with pytest.raises(appsync_publisher.AppSyncPublishError, match="HTTP 403"):
+        publisher.publish("progress", "s#0", {})
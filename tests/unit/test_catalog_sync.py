@@ -0,0 +1,160 @@
+import pytest
+
+from grocery_shared.product import Product
+
+
+@pytest.fixture(scope="module")
+def catalog_sync(load_lambda_module):
+    return load_lambda_module("create_stripe_products", "utilities.catalog_sync")
+
+
+def make_product(product_id="sku-1", price=250, modified="2024-01-01"):
+    return Product.from_dict(
+        {
+            "productId": product_id,
+            "category": "fruit",
+            "createdDate": "2023-01-01",
+            "description": "Fresh",
+            "modifiedDate": modified,
+            "name": f"Product {product_id}",
+            "package": {"height": 1, "length": 2, "weight": 3, "width": 4},
+            "pictures": [],
+            "price": price,
+            "tags": [],
+        }
+    )
+
+
+def make_stripe_product(
+    catalog_sync,
+    product_id="sku-1",
+    stripe_product_id="prod_1",
+    price_id="price_1",
+    unit_amount=250,
+    modified="2024-01-01",
+    active=True,
+    created=1,
+):
+    return catalog_sync.StripeProduct(
+        product_id=product_id,
+        stripe_product_id=stripe_product_id,
+        stripe_price_id=price_id,
+        unit_amount=unit_amount if price_id else None,
+        modified_date=modified,
+        active=active,
+        created=created,
+    )
+
+
+def kinds(actions):
+    return [(action.kind, action.product_id, action.changes) for action in actions]
+
+
+def test_creates_products_missing_from_stripe(catalog_sync):
+    actions = catalog_sync.plan_sync([make_product()], [])
+
+    assert kinds(actions) == [("create", "sku-1", ())]
+    assert actions[0].existing is None
+
+
+def test_leaves_matching_products_unchanged(catalog_sync):
+    existing = make_stripe_product(catalog_sync)
+
+    actions = catalog_sync.plan_sync([make_product()], [existing])
+
+    assert kinds(actions) == [("unchanged", "sku-1", ())]
+    assert actions[0].existing == existing
+
+
+def test_updates_changed_modified_date_and_price(catalog_sync):
+    actions = catalog_sync.plan_sync(
+        [make_product(price=300, modified="2024-02-01")],
+        [make_stripe_product(catalog_sync)],
+    )
+
+    assert kinds(actions) == [("update", "sku-1", ("modifiedDate", "price"))]
+
+
+def test_reprices_products_without_an_active_price(catalog_sync):
+    actions = catalog_sync.plan_sync(
+        [make_product()], [make_stripe_product(catalog_sync, price_id=None)]
+    )
+
+    assert kinds(actions) == [("update", "sku-1", ("price",))]
+
+
+def test_archives_active_products_removed_from_catalog(catalog_sync):
+    removed = make_stripe_product(catalog_sync, product_id="sku-2")
+    already_archived = make_stripe_product(
+        catalog_sync, product_id="sku-3", stripe_product_id="prod_3", active=False
+    )
+
+    actions = catalog_sync.plan_sync([], [removed, already_archived])
+
+    assert kinds(actions) == [("archive", "sku-2", ("removed",))]
+    assert actions[0].existing == removed
+
+
+def test_ignores_stripe_products_outside_the_catalog_ids(catalog_sync):
+    actions = catalog_sync.plan_sync(
+        [make_product("sku-1")], [make_stripe_product(catalog_sync)]
+    )
+
+    assert all(action.kind != "archive" for action in actions)
+
+
+def test_keeps_newest_active_priced_duplicate_and_archives_the_rest(catalog_sync):
+    priced = make_stripe_product(catalog_sync, stripe_product_id="prod_old", created=1)
+    newer_without_price = make_stripe_product(
+        catalog_sync, stripe_product_id="prod_new", price_id=None, created=2
+    )
+    archived = make_stripe_product(
+        catalog_sync, stripe_product_id="prod_archived", active=False, created=3
+    )
+
+    actions = catalog_sync.plan_sync(
+        [make_product()], [newer_without_price, archived, priced]
+    )
+
+    assert kinds(actions) == [
+        ("unchanged", "sku-1", ()),
+        ("archive", "sku-1", ("duplicate",)),
+    ]
+    assert actions[0].existing == priced
+    assert actions[1].existing == newer_without_price
+
+
+def test_reactivates_archived_product_back_in_catalog(catalog_sync):
+    archived = make_stripe_product(catalog_sync, active=False)
+
+    actions = catalog_sync.plan_sync([make_product()], [archived])
+
+    assert kinds(actions) == [("update", "sku-1", ("archived",))]
+    assert actions[0].existing == archived
+
+
+def test_prefers_active_product_over_newer_archived_one(catalog_sync):
+    active = make_stripe_product(catalog_sync, stripe_product_id="prod_1", created=1)
+    archived = make_stripe_product(
+        catalog_sync, stripe_product_id="prod_2", active=False, created=2
+    )
+
+    actions = catalog_sync.plan_sync([make_product()], [archived, active])
+
+    assert kinds(actions) == [("unchanged", "sku-1", ())]
+    assert actions[0].existing == active
+
+
+def test_summarize_counts_every_kind(catalog_sync):
+    actions = catalog_sync.plan_sync(
+        [make_product("sku-1"), make_product("sku-2")],
+        [make_stripe_product(catalog_sync, product_id="sku-3")],
+    )
+
+    assert catalog_sync.summarize(actions) == {
+        "create": 2,
+        "update": 0,
+        "archive": 1,
+        "restore": 0,
+        "unchanged": 0,
+    }
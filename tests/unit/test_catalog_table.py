@@ -0,0 +1,48 @@
+import pytest
+from botocore.exceptions import ClientError
+
+
+@pytest.fixture(scope="module")
+def catalog_table(load_lambda_module):
+    return load_lambda_module("agent", "utilities.catalog_table")
+
+
+class FakeDynamoDB:
+    def __init__(self, items, failing=()):
+        self.items = items
+        self.failing = set(failing)
+
+    def query(self, ExpressionAttributeValues, **kwargs):
+        key = ExpressionAttributeValues[":pk"]["S"]
+        if key in self.failing:
+            raise ClientError(
+                {"Error": {"Code": "ThrottlingException", "Message": "slow down"}},
+                "Query",
+            )
+        item = self.items.get(key)
+        return {"Items": [item] if item else []}
+
+
+def price_item(product_id, price_id):
+    return {"stripeProductId": {"S": product_id}, "stripePriceId": {"S": price_id}}
+
+
+def test_looks_up_names_by_their_product_name_key(catalog_table, monkeypatch):
+    client = FakeDynamoDB({"PRODUCTNAME#whole milk": price_item("prod_1", "price_1")})
+    monkeypatch.setattr(catalog_table, "get_dynamodb_client", lambda: client)
+
+    found = catalog_table.lookup_prices("table", ["Whole  Milk", "whole milk", "tea"])
+
+    assert found == {"whole milk": ("prod_1", "price_1")}
+
+
+def test_failed_lookups_count_as_missing(catalog_table, monkeypatch):
+    client = FakeDynamoDB(
+        {"PRODUCTNAME#tea": price_item("prod_2", "price_2")},
+        failing=["PRODUCTNAME#whole milk"],
+    )
+    monkeypatch.setattr(catalog_table, "get_dynamodb_client", lambda: client)
+
+    found = catalog_table.lookup_prices("table", ["Whole Milk", "Tea"])
+
+    assert found == {"tea": ("prod_2", "price_2")}
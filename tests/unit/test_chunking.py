@@ -0,0 +1,56 @@
+import pytest
+
+
+@pytest.fixture(scope="module")
+def chunking(load_lambda_module):
+    return load_lambda_module("sqs_poller", "chunking")
+
+
+def test_splits_on_line_boundaries_within_the_budgets(chunking):
+    text = "\n".join(f"item {i}" for i in range(10))
+
+    chunks = chunking.split_into_chunks(text, max_tokens=1000, max_lines=4)
+
+    assert [chunk.count("\n") + 1 for chunk in chunks] == [4, 4, 2]
+    assert "\n".join(chunks) == text
+
+
+def test_line_over_the_token_budget_is_a_chunk_of_its_own(chunking):
+    long_line = "x" * 100
+
+    chunks = chunking.split_into_chunks(f"a\n\n{long_line}\nb", max_tokens=10)
+
+    assert chunks == ["a", long_line, "b"]
+
+
+def test_parses_model_lines(chunking):
+    assert chunking.parse_model_line("- Flour, 1.5 KG") == (
+        "Flour",
+        chunking.Decimal("1.5"),
+        "kg",
+    )
+    assert chunking.parse_model_line("Groceries") is None
+
+
+def test_merges_items_across_chunks(chunking):
+    merged = chunking.merge_grocery_lists(
+        [
+            "Groceries:\n- Tomatoes, 2 kg\n- Milk, 1",
+            chunking.NO_GROCERY_LIST,
+            "- tomatoes, 0.5 kg\n- Tomatoes, 3\nsomething else",
+        ]
+    )
+
+    assert merged.splitlines() == [
+        "- Tomatoes, 2.5 kg",
+        "- Milk, 1",
+        "- Tomatoes, 3",
+        "something else",
+    ]
+
+
+def test_no_grocery_list_in_any_chunk(chunking):
+    assert (
+        chunking.merge_grocery_lists([chunking.NO_GROCERY_LIST, ""])
+        == chunking.NO_GROCERY_LIST
+    )
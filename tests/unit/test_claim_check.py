@@ -0,0 +1,72 @@
+import io
+
+import pytest
+
+from grocery_shared.claim_check import ClaimCheck
+
+
+class FakeS3:
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, ContentType):
+        self.objects[(Bucket, Key)] = Body
+
+    def get_object(self, Bucket, Key):
+        return {"Body": io.BytesIO(self.objects[(Bucket, Key)])}
+
+
+@pytest.fixture
+def s3():
+    return FakeS3()
+
+
+def make_claim_check(s3, bucket="bucket"):
+    claim_check = ClaimCheck(bucket=bucket, threshold_bytes=10, prefix="cc/")
+    claim_check._client = s3
+    return claim_check
+
+
+def test_keeps_small_fields_inline(s3):
+    claim_check = make_claim_check(s3)
+    payload = {"text": "short", "id": 1}
+
+    assert claim_check.offload(payload, "text") is payload
+    assert claim_check.resolve(payload, "text") == "short"
+    assert s3.objects == {}
+
+
+def test_offloads_and_resolves_large_fields(s3):
+    claim_check = make_claim_check(s3)
+    text = "Tomatoes, 2 kg — Äpfel"
+
+    offloaded = claim_check.offload({"text": text, "id": 1}, "text")
+
+    assert "text" not in offloaded
+    assert offloaded["id"] == 1
+    assert offloaded["text_ref"]["bucket"] == "bucket"
+    assert offloaded["text_ref"]["key"].startswith("cc/")
+    assert claim_check.resolve(offloaded, "text") == text
+
+
+def test_identical_texts_share_one_object(s3):
+    claim_check = make_claim_check(s3)
+
+    first = claim_check.offload({"text": "x" * 20}, "text")
+    second = claim_check.offload({"text": "x" * 20}, "text")
+
+    assert first == second
+    assert len(s3.objects) == 1
+
+
+def test_keeps_large_fields_inline_without_a_bucket(s3):
+    claim_check = make_claim_check(s3, bucket=None)
+    payload = {"text": "x" * 20}
+
+    assert claim_check.offload(payload, "text") is payload
+    assert s3.objects == {}
+
+
+def test_resolve_requires_the_field(s3):
+    with pytest.raises(KeyError):
+        make_claim_check(s3).resolve({}, "text")
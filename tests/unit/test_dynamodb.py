@@ -0,0 +1,19 @@
+from time import time
+
+from grocery_shared.dynamodb import expires_at, unexpired
+
+
+def test_keeps_unexpired_items_in_either_format():
+    plain = {"PK": "CART#1", "ttl": expires_at(60)}
+    low_level = {"PK": {"S": "EXTRACTION#1"}, "ttl": {"N": str(expires_at(60))}}
+
+    assert unexpired(plain) is plain
+    assert unexpired(low_level) is low_level
+
+
+def test_drops_missing_and_expired_items():
+    assert unexpired(None) is None
+    assert unexpired({}) is None
+    assert unexpired({"PK": "CART#1"}) is None
+    assert unexpired({"ttl": int(time()) - 1}) is None
+    assert unexpired({"ttl": {"N": str(int(time()) - 1)}}) is None
@@ -0,0 +1,47 @@
+import pytest
+
+
+@pytest.fixture(scope="module")
+def fuzzy_match(load_lambda_module):
+    return load_lambda_module("agent", "utilities.fuzzy_match")
+
+
+@pytest.fixture(scope="module")
+def matcher(fuzzy_match):
+    return fuzzy_match.FuzzyMatcher(
+        ["strawberry", "peach", "fresh lemons", "whole milk", "box", "!!"]
+    )
+
+
+def test_skips_names_without_trigrams(matcher):
+    assert len(matcher) == 5
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("strawberries", "strawberry"),
+        ("Peaches", "peach"),
+        ("lemons", "fresh lemons"),
+        ("milk whole", "whole milk"),
+        ("boxes", "box"),
+    ],
+)
+def test_matches_plurals_and_partial_names(matcher, query, expected):
+    name, score = matcher.best_match(query)
+
+    assert name == expected
+    assert 0 < score <= 1
+
+
+def test_exact_name_scores_one(matcher):
+    assert matcher.best_match("Whole Milk") == ("whole milk", 1.0)
+
+
+def test_no_shared_trigram_is_no_match(matcher):
+    assert matcher.best_match("zzz") is None
+    assert matcher.best_match("") is None
+
+
+def test_trigrams_are_padded_like_pg_trgm(fuzzy_match):
+    assert fuzzy_match.trigrams("Cats") == frozenset({"  c", " ca", "cat", "at "})
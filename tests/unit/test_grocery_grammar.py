@@ -0,0 +1,62 @@
+import pytest
+
+from grocery_shared.grocery_grammar import strip_bullet
+
+
+@pytest.fixture(scope="module")
+def rule_extractor(load_lambda_module):
+    return load_lambda_module("sqs_poller", "rule_extractor")
+
+
+@pytest.fixture(scope="module")
+def grocery_list_parser(load_lambda_module):
+    return load_lambda_module("agent", "utilities.grocery_list_parser")
+
+
+@pytest.mark.parametrize("line", ["- Milk", "* Milk", "• Milk", "1. Milk", "2) Milk"])
+def test_strips_bullets_and_numbering(line):
+    assert strip_bullet(line) == "Milk"
+
+
+@pytest.mark.parametrize(
+    "line, expected",
+    [
+        ("Tomatoes, 2 kg", ("Tomatoes", 2, "kg")),
+        ("Tomatoes: 2", ("Tomatoes", 2, None)),
+        ("2 KG of tomatoes", ("tomatoes", 2, "kg")),
+        ("Milk x3", ("Milk", 3, None)),
+        ("Eggs 12", ("Eggs", 12, None)),
+        ("Bread | 1 | pack", ("Bread", 1, "pack")),
+    ],
+)
+def test_rule_extractor_parses_list_lines(rule_extractor, line, expected):
+    assert tuple(rule_extractor.parse_line(line)) == expected
+
+
+@pytest.mark.parametrize("line", ["Call mom at 5", "fl0ur, 2", "Milk, 0"])
+def test_rule_extractor_rejects_notes_and_noise(rule_extractor, line):
+    assert rule_extractor.parse_line(line) is None
+
+
+def test_extract_scores_free_form_text_low(rule_extractor):
+    result = rule_extractor.extract("Shopping list:\nMilk, 2\nremember the party")
+
+    assert [item.name for item in result.items] == ["Milk"]
+    assert result.confidence == 0.5
+    assert rule_extractor.extract_confident("Milk, 2\nremember the party") is None
+
+
+def test_agent_parses_the_extractor_output(rule_extractor, grocery_list_parser):
+    text = "- Tomatoes, 2 kg\n- Milk x3\n- Bread | 1 | pack"
+    grocery_list = rule_extractor.extract_confident(text)
+
+    items = grocery_list_parser.parse_grocery_list(grocery_list)
+
+    assert [tuple(item) for item in items] == [
+        tuple(item) for item in rule_extractor.extract(text).items
+    ]
+
+
+def test_agent_rejects_ambiguous_lists(grocery_list_parser):
+    assert grocery_list_parser.parse_grocery_list("Milk, 2\nsome cheese") is None
+    assert grocery_list_parser.parse_grocery_list("Groceries:\n") is None
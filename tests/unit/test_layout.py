@@ -0,0 +1,77 @@
+import pytest
+
+
+@pytest.fixture(scope="module")
+def layout(load_lambda_module):
+    return load_lambda_module("textract_results", "layout")
+
+
+def make_words(layout, words):
+    """
+    Page words from (text, left, top) tuples, with boxes of 0.01 per
+    character wide and 0.02 high.
+    """
+    page = layout.PageWords()
+    for text, left, top in words:
+        page.add(
+            {
+                "Text": text,
+                "Geometry": {
+                    "BoundingBox": {
+                        "Left": left,
+                        "Top": top,
+                        "Width": 0.01 * len(text),
+                        "Height": 0.02,
+                    }
+                },
+            }
+        )
+    return page
+
+
+RECEIPT = [
+    # Out of order, and slightly skewed within rows
+    ("2", 0.5, 0.101),
+    ("Whole", 0.1, 0.1),
+    ("Milk", 0.16, 0.1),
+    ("$3.98", 0.8, 0.102),
+    ("Bananas", 0.1, 0.15),
+    ("1", 0.5, 0.149),
+    ("kg", 0.6, 0.15),
+    ("$1.20", 0.8, 0.15),
+    ("TOTAL", 0.1, 0.2),
+    ("$5.18", 0.8, 0.2),
+]
+
+
+def test_groups_words_into_rows_and_cells(layout):
+    rows = layout.group_cells(make_words(layout, RECEIPT))
+
+    assert rows == [
+        ["Whole Milk", "2", "$3.98"],
+        ["Bananas", "1", "kg", "$1.20"],
+        ["TOTAL", "$5.18"],
+    ]
+
+
+def test_empty_page_has_no_rows(layout):
+    assert layout.group_cells(layout.PageWords()) == []
+
+
+def test_formats_rows_without_prices(layout):
+    assert layout.format_row(["Whole Milk", "2", "$3.98"]) == "Whole Milk | 2"
+    assert layout.format_row(["Bananas", "1", "kg", "$1.20"]) == "Bananas | 1 | kg"
+    assert layout.format_row(["Eggs", "x12"]) == "Eggs | 12"
+    assert layout.format_row(["$5.18"]) is None
+
+
+def test_lays_out_tables(layout):
+    text = layout.layout_text(make_words(layout, RECEIPT))
+
+    assert text.splitlines() == ["Whole Milk | 2", "Bananas | 1 | kg", "TOTAL"]
+
+
+def test_leaves_plain_lines_to_textract(layout):
+    words = make_words(layout, [("Buy", 0.1, 0.1), ("milk", 0.14, 0.1)])
+
+    assert layout.layout_text(words) is None
@@ -0,0 +1,87 @@
+from time import time
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def payment_link_cache(load_lambda_module):
+    return load_lambda_module("agent", "utilities.payment_link_cache")
+
+
+class FakeTable:
+    def __init__(self):
+        self.items = {}
+
+    def get_item(self, Key):
+        item = self.items.get((Key["PK"], Key["SK"]))
+        return {"Item": item} if item else {}
+
+    def put_item(self, Item):
+        self.items[(Item["PK"], Item["SK"])] = Item
+
+
+class FakeStripe:
+    def __init__(self):
+        self.created = []
+        self.inactive = set()
+
+    def create(self, line_items):
+        link_id = f"plink_{len(self.created)}"
+        self.created.append(line_items)
+        return SimpleNamespace(id=link_id, url=f"https://buy.stripe.com/{link_id}")
+
+    def is_active(self, link_id):
+        return link_id not in self.inactive
+
+    def get(self, table, line_items, payment_link_cache):
+        return payment_link_cache.get_or_create_payment_link(
+            table, line_items, self.create, self.is_active
+        )
+
+
+def test_cart_hash_ignores_order_and_splitting(payment_link_cache):
+    assert payment_link_cache.cart_hash(
+        [{"price": "b", "quantity": 1}, {"price": "a", "quantity": 2}]
+    ) == payment_link_cache.cart_hash(
+        [
+            {"price": "a", "quantity": 1},
+            {"price": "b", "quantity": 1},
+            {"price": "a", "quantity": 1},
+        ]
+    )
+
+
+def test_reuses_the_active_link_of_an_identical_cart(payment_link_cache):
+    table, stripe = FakeTable(), FakeStripe()
+    cart = [{"price": "price_1", "quantity": 2}]
+
+    first = stripe.get(table, cart, payment_link_cache)
+    second = stripe.get(table, list(reversed(cart)), payment_link_cache)
+
+    assert first == second == "https://buy.stripe.com/plink_0"
+    assert len(stripe.created) == 1
+
+
+def test_replaces_a_deactivated_link(payment_link_cache):
+    table, stripe = FakeTable(), FakeStripe()
+    cart = [{"price": "price_1", "quantity": 2}]
+
+    stripe.get(table, cart, payment_link_cache)
+    stripe.inactive.add("plink_0")
+    url = stripe.get(table, cart, payment_link_cache)
+
+    assert url == "https://buy.stripe.com/plink_1"
+    assert stripe.get(table, cart, payment_link_cache) == url
+    assert len(stripe.created) == 2
+
+
+def test_ignores_expired_links(payment_link_cache):
+    table, stripe = FakeTable(), FakeStripe()
+    cart = [{"price": "price_1", "quantity": 1}]
+
+    stripe.get(table, cart, payment_link_cache)
+    for item in table.items.values():
+        item["ttl"] = int(time()) - 1
+
+    assert stripe.get(table, cart, payment_link_cache).endswith("plink_1")
@@ -0,0 +1,115 @@
+import pytest
+
+
+@pytest.fixture(scope="module")
+def price_index(load_lambda_module):
+    return load_lambda_module("agent", "utilities.price_index")
+
+
+class CountingLoader:
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return dict(self.catalog)
+
+
+def test_normalizes_names(price_index):
+    assert price_index.normalize_product_name("  Fresh   LEMONS ") == "fresh lemons"
+
+
+def test_resolves_from_the_loaded_catalog(price_index):
+    loader = CountingLoader({"fresh lemons": ("prod_1", "price_1")})
+    index = price_index.PriceIndex(loader)
+
+    resolved, missing = index.resolve(["Fresh Lemons", "fresh lemons"])
+
+    assert resolved == {"fresh lemons": ("prod_1", "price_1")}
+    assert missing == []
+    assert loader.calls == 1
+
+    index.resolve(["Fresh Lemons"])
+    assert loader.calls == 1
+
+
+def test_point_lookup_avoids_the_full_reload(price_index):
+    loader = CountingLoader({})
+    lookups = []
+
+    def lookup(names):
+        lookups.append(names)
+        return {"milk": ("prod_2", "price_2")}
+
+    index = price_index.PriceIndex(loader, lookup=lookup)
+
+    resolved, missing = index.resolve(["Milk"])
+
+    assert resolved == {"milk": ("prod_2", "price_2")}
+    assert missing == []
+    assert lookups == [["Milk"]]
+    assert loader.calls == 0
+
+
+def test_unknown_names_reload_at_most_once_per_interval(price_index):
+    loader = CountingLoader({"milk": ("prod_2", "price_2")})
+    index = price_index.PriceIndex(loader, min_refresh_seconds=60)
+
+    for _ in range(5):
+        resolved, missing = index.resolve(["bananas"])
+        assert missing == ["bananas"]
+
+    assert loader.calls == 1
+
+
+def test_unknown_names_reload_again_after_the_interval(price_index):
+    loader = CountingLoader({})
+    index = price_index.PriceIndex(loader, min_refresh_seconds=0)
+
+    index.resolve(["bananas"])
+    loader.catalog["bananas"] = ("prod_3", "price_3")
+    resolved, missing = index.resolve(["bananas"])
+
+    assert resolved == {"bananas": ("prod_3", "price_3")}
+    assert loader.calls == 2
+
+
+def test_evicts_least_recently_used_names(price_index):
+    index = price_index.PriceIndex(CountingLoader({}), max_entries=2)
+    index.put("a", "prod_a", "price_a")
+    index.put("b", "prod_b", "price_b")
+    index.get("a")
+    index.put("c", "prod_c", "price_c")
+
+    assert index.get("a") == ("prod_a", "price_a")
+    assert index.get("b") is None
+    assert len(index) == 2
+
+
+def test_matches_near_miss_names(price_index):
+    index = price_index.PriceIndex(
+        CountingLoader(
+            {
+                "strawberries": ("prod_1", "price_1"),
+                "fresh lemons": ("prod_2", "price_2"),
+            }
+        )
+    )
+    index.refresh()
+
+    matches, missing = index.match(["fresh strawberries", "motor oil"])
+
+    assert matches["fresh strawberries"][0] == "strawberries"
+    assert missing == ["motor oil"]
+
+
+def test_names_the_lookup_misses_fall_back_to_the_reload(price_index):
+    loader = CountingLoader({"milk": ("prod_2", "price_2")})
+    index = price_index.PriceIndex(loader, lookup=lambda names: {})
+
+    resolved, missing = index.resolve(["Milk"])
+
+    assert resolved == {"milk": ("prod_2", "price_2")}
+    assert missing == []
+    assert loader.calls == 1
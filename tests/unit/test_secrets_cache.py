@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from grocery_shared import secrets_cache as secrets_cache_module
+from grocery_shared.secrets_cache import SecretsCache
+
+
+class FakeSecretsManager:
+    def __init__(self, value="first", version_id="v1"):
+        self.value = value
+        self.version_id = version_id
+        self.calls = 0
+
+    def get_secret_value(self, SecretId):
+        self.calls += 1
+        return {"SecretString": self.value, "VersionId": self.version_id}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(secrets_cache_module, "monotonic", clock)
+    return clock
+
+
+def make_cache(client, ttl_seconds=300):
+    cache = SecretsCache(ttl_seconds=ttl_seconds, region_name="us-east-1")
+    cache._client = client
+    return cache
+
+
+def test_serves_hits_within_the_ttl(clock):
+    client = FakeSecretsManager()
+    cache = make_cache(client)
+
+    assert cache.get_secret_string("stripe") == "first"
+    clock.now += 299
+    assert cache.get_secret_string("stripe") == "first"
+
+    assert client.calls == 1
+    assert cache.stats == {"hits": 1, "misses": 1, "rotations": 0}
+
+
+def test_refetches_after_the_ttl(clock):
+    client = FakeSecretsManager()
+    cache = make_cache(client)
+
+    cache.get_secret_string("stripe")
+    clock.now += 300
+    client.value = "second"
+
+    assert cache.get_secret_string("stripe") == "second"
+    assert client.calls == 2
+    assert cache.stats["rotations"] == 0
+
+
+def test_counts_rotations_when_the_version_changes(clock):
+    client = FakeSecretsManager()
+    cache = make_cache(client)
+
+    cache.get_secret_string("stripe")
+    clock.now += 300
+    client.value, client.version_id = "rotated", "v2"
+    cache.get_secret_string("stripe")
+    clock.now += 300
+    cache.get_secret_string("stripe")
+
+    assert cache.stats == {"hits": 0, "misses": 3, "rotations": 1}
+
+
+def test_invalidate_forces_a_refetch(clock):
+    client = FakeSecretsManager(value=json.dumps({"STRIPE_SECRET_KEY": "sk_1"}))
+    cache = make_cache(client)
+
+    cache.get_secret_json("stripe")
+    cache.get_secret_string("other")
+    cache.invalidate("stripe")
+    cache.get_secret_json("stripe")
+    cache.get_secret_string("other")
+    assert client.calls == 3
+
+    cache.invalidate()
+    cache.get_secret_string("other")
+    assert client.calls == 4
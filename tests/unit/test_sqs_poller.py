@@ -0,0 +1,113 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def sqs_poller(load_lambda_module):
+    return load_lambda_module("sqs_poller", "lambda_sqs_poller")
+
+
+class FakeStepFunctions:
+    def __init__(self):
+        self.successes = []
+        self.failures = []
+
+    def send_task_success(self, taskToken, output):
+        self.successes.append((taskToken, json.loads(output)))
+
+    def send_task_failure(self, taskToken, error, cause):
+        self.failures.append((taskToken, error))
+
+
+@pytest.fixture
+def stepfunctions(sqs_poller, monkeypatch):
+    client = FakeStepFunctions()
+    monkeypatch.setattr(sqs_poller, "stepfunctions_client", client)
+    monkeypatch.setattr(sqs_poller, "read_cache", lambda key: None)
+    monkeypatch.setattr(sqs_poller, "write_cache", lambda key, grocery_list: None)
+    return client
+
+
+@pytest.fixture
+def failing_model(sqs_poller, monkeypatch):
+    def extract_grocery_list(input_text):
+        raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr(sqs_poller, "extract_grocery_list", extract_grocery_list)
+
+
+def record(message_id, text, task_token="token", receive_count=1):
+    body = {"input": {"text": text}}
+    if task_token:
+        body["taskToken"] = task_token
+    return {
+        "messageId": message_id,
+        "body": json.dumps(body),
+        "attributes": {"ApproximateReceiveCount": str(receive_count)},
+    }
+
+
+def invoke(sqs_poller, *records):
+    context = SimpleNamespace(
+        function_name="sqs_poller",
+        memory_limit_in_mb=128,
+        invoked_function_arn="arn:aws:lambda:us-east-1:123456789012:function:x",
+        aws_request_id="request",
+    )
+    return sqs_poller.handler({"Records": list(records)}, context)
+
+
+def test_reports_only_the_failed_records(sqs_poller, stepfunctions, failing_model):
+    response = invoke(
+        sqs_poller,
+        record("ok-1", "Milk, 2\nEggs, 12", task_token="token-1"),
+        record("failed", "something to think about", task_token="token-2"),
+        record("ok-2", "Bread x1", task_token="token-3"),
+    )
+
+    assert response == {"batchItemFailures": [{"itemIdentifier": "failed"}]}
+    assert sorted(token for token, _ in stepfunctions.successes) == [
+        "token-1",
+        "token-3",
+    ]
+
+
+def test_succeeding_batch_has_no_failures(sqs_poller, stepfunctions):
+    response = invoke(sqs_poller, record("ok", "Milk, 2"))
+
+    assert response == {"batchItemFailures": []}
+    assert stepfunctions.successes[0][1]["grocery_list"] == "- Milk, 2"
+
+
+@pytest.mark.parametrize("receive_count", [1, 2])
+def test_earlier_attempts_leave_the_workflow_waiting(
+    sqs_poller, stepfunctions, failing_model, receive_count
+):
+    invoke(sqs_poller, record("m", "some notes", receive_count=receive_count))
+
+    assert stepfunctions.failures == []
+
+
+def test_last_attempt_fails_the_workflow(sqs_poller, stepfunctions, failing_model):
+    invoke(
+        sqs_poller,
+        record("m", "some notes", receive_count=sqs_poller.MAX_RECEIVE_COUNT),
+    )
+
+    assert stepfunctions.failures == [("token", "ProcessingError")]
+
+
+def test_never_fails_the_workflow_without_a_task_token(
+    sqs_poller, stepfunctions, failing_model
+):
+    response = invoke(
+        sqs_poller,
+        record(
+            "m", "Milk, 2", task_token=None, receive_count=sqs_poller.MAX_RECEIVE_COUNT
+        ),
+    )
+
+    assert response == {"batchItemFailures": [{"itemIdentifier": "m"}]}
+    assert stepfunctions.failures == []
@@ -0,0 +1,60 @@
+import pytest
+
+
+@pytest.fixture(scope="module")
+def textract_results(load_lambda_module):
+    return load_lambda_module("textract_results", "textract_results")
+
+
+def line(text, page):
+    return {"BlockType": "LINE", "Text": text, "Page": page}
+
+
+def word(text, page, left, top):
+    return {
+        "BlockType": "WORD",
+        "Text": text,
+        "Page": page,
+        "Geometry": {
+            "BoundingBox": {"Left": left, "Top": top, "Width": 0.05, "Height": 0.02}
+        },
+    }
+
+
+def test_builds_the_text_of_every_page_in_order(textract_results):
+    blocks = [
+        {"BlockType": "PAGE", "Page": 1},
+        line("Buy milk", 1),
+        word("Buy", 1, 0.1, 0.1),
+        word("milk", 1, 0.16, 0.1),
+        {"BlockType": "PAGE", "Page": 2},
+        line("Bread 1 $2.00", 2),
+        word("Bread", 2, 0.1, 0.1),
+        word("1", 2, 0.5, 0.1),
+        word("$2.00", 2, 0.8, 0.1),
+        {"BlockType": "PAGE", "Page": 3},
+    ]
+
+    assert textract_results.build_text(blocks) == "Buy milk\nBread | 1"
+
+
+def test_lays_out_each_page_before_reading_the_next(textract_results):
+    consumed = []
+
+    def blocks():
+        for page in (1, 2):
+            for block in (line(f"Page {page}", page), word("Page", page, 0.1, 0.1)):
+                consumed.append(page)
+                yield block
+
+    texts = textract_results.iter_page_texts(blocks())
+
+    assert next(texts) == "Page 1"
+    assert consumed == [1, 1, 2]
+    assert list(texts) == ["Page 2"]
+
+
+def test_blocks_without_page_numbers_are_one_page(textract_results):
+    blocks = [{"BlockType": "LINE", "Text": "Milk, 2"}]
+
+    assert textract_results.build_text(blocks) == "Milk, 2"
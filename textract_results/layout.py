@@ -0,0 +1,133 @@
+import os
+import re
+from typing import List, Optional
+
+import numpy as np
+
+from grocery_shared.grocery_grammar import UNITS
+
+# Share of rows with two or more cells from which a page is laid out as a
+# table (receipts, price lists) instead of plain lines
+LAYOUT_MIN_TABLE_ROWS = float(os.environ.get("LAYOUT_MIN_TABLE_ROWS", "0.3"))
+
+# Prices are dropped: the extraction only needs items, quantities and units
+_PRICE_RE = re.compile(r"^-?[$€£]?\d+[.,]\d{2}\s*[A-Z]?$")
+_QUANTITY_RE = re.compile(
+    rf"^(?:x\s*)?(?P<quantity>\d+)\s*(?:x|@.*)?\s*(?P<unit>{UNITS})?$", re.IGNORECASE
+)
+_UNIT_RE = re.compile(rf"^{UNITS}$", re.IGNORECASE)
+
+
+class PageWords:
+    """
+    The WORD blocks of one page: their texts, and their bounding boxes as
+    (left, top, width, height) rows, in page-relative coordinates.
+
+    Only these five values are kept per word rather than the Textract block
+    dicts, which carry polygons, ids and relationships.
+    """
+
+    __slots__ = ("texts", "boxes")
+
+    def __init__(self):
+        self.texts: List[str] = []
+        self.boxes: List[tuple] = []
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def add(self, block: dict) -> None:
+        box = block["Geometry"]["BoundingBox"]
+        self.texts.append(block["Text"])
+        self.boxes.append((box["Left"], box["Top"], box["Width"], box["Height"]))
+
+
+def group_cells(words: PageWords) -> List[List[str]]:
+    """
+    Group the words of a page into rows, and the words of each row into
+    cells separated by wide horizontal gaps (columns).
+
+    Words are in the same row when their vertical centers are within half
+    the median word height of the previous word's, and in the same cell when
+    the gap to the previous word is under two median character widths.
+
+    Returns:
+        The rows from top to bottom, each a list of cell texts from left to
+        right.
+    """
+    if not len(words):
+        return []
+    boxes = np.asarray(words.boxes, dtype=np.float64)
+    left, top, width, height = boxes.T
+    center = top + height / 2
+
+    # Rows: break where the next center (in vertical order) jumps
+    by_center = np.argsort(center, kind="stable")
+    row_breaks = np.diff(center[by_center]) > 0.5 * np.median(height)
+    row = np.empty(len(words), dtype=np.intp)
+    row[by_center] = np.concatenate(([0], np.cumsum(row_breaks)))
+
+    # Cells: break at new rows and at gaps wider than two characters
+    order = np.lexsort((left, row))
+    lengths = np.fromiter((len(text) for text in words.texts), np.float64, len(words))
+    char_width = np.median(width / np.maximum(lengths, 1))
+    gaps = left[order][1:] - (left + width)[order][:-1]
+    new_row = row[order][1:] != row[order][:-1]
+    cell_starts = np.flatnonzero(new_row | (gaps > 2 * char_width)) + 1
+    row_starts = set((np.flatnonzero(new_row) + 1).tolist())
+
+    rows: List[List[str]] = [[]]
+    bounds = [0, *cell_starts.tolist(), len(words)]
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        if start in row_starts:
+            rows.append([])
+        rows[-1].append(" ".join(words.texts[i] for i in order[start:end]))
+    return rows
+
+
+def is_table(
+    rows: List[List[str]], min_table_rows: float = LAYOUT_MIN_TABLE_ROWS
+) -> bool:
+    table_rows = sum(len(cells) > 1 for cells in rows)
+    return bool(rows) and table_rows >= min_table_rows * len(rows)
+
+
+def format_row(cells: List[str]) -> Optional[str]:
+    """
+    Format a table row as "item | qty | unit", leaving out prices and
+    trailing empty fields ("item | qty", "item"). Rows without item text,
+    e.g. price-only rows, are dropped.
+    """
+    item: List[str] = []
+    quantity = unit = ""
+    for cell in cells:
+        if _PRICE_RE.match(cell):
+            continue
+        match = _QUANTITY_RE.match(cell)
+        if match and not quantity:
+            quantity = match.group("quantity")
+            unit = unit or (match.group("unit") or "").lower()
+        elif _UNIT_RE.match(cell) and not unit:
+            unit = cell.lower()
+        else:
+            item.append(cell)
+    if not item:
+        return None
+    fields = [" ".join(item), quantity, unit]
+    while not fields[-1]:
+        fields.pop()
+    return " | ".join(fields)
+
+
+def layout_text(words: PageWords) -> Optional[str]:
+    """
+    Lay out a page with columns as compact "item | qty | unit" rows.
+
+    Returns:
+        The rows joined with newlines, or None when the page isn't laid out
+        in columns, in which case its LINE texts read better.
+    """
+    rows = group_cells(words)
+    if not is_table(rows):
+        return None
+    return "\n".join(filter(None, map(format_row, rows)))
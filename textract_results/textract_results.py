@@ -0,0 +1,126 @@
+import boto3
+from typing import Iterable, Iterator, List
+from botocore.config import Config
+from aws_lambda_powertools import Logger
+from grocery_shared.claim_check import claim_check
+from layout import PageWords, layout_text
+
+# Textract throttles GetDocumentTextDetection per account; back off adaptively
+textract_client = boto3.client(
+    "textract",
+    region_name="us-east-1",
+    config=Config(retries={"max_attempts": 8, "mode": "adaptive"}),
+)
+
+logger = Logger()
+
+
+def iter_result_pages(job_id: str) -> Iterator[dict]:
+    """
+    Yield the result pages of a text detection job, following NextToken.
+    Only one page of up to 1000 blocks is held at a time.
+    """
+    kwargs = {"JobId": job_id, "MaxResults": 1000}
+    while True:
+        response = textract_client.get_document_text_detection(**kwargs)
+        yield response
+        next_token = response.get("NextToken")
+        if not next_token:
+            return
+        kwargs["NextToken"] = next_token
+
+
+def _page_text(lines: List[str], words: PageWords) -> str:
+    table = layout_text(words) if len(words) else None
+    return table if table is not None else "\n".join(lines)
+
+
+def iter_page_texts(blocks: Iterable[dict]) -> Iterator[str]:
+    """
+    Yield the text of each page of Textract blocks as soon as the page is
+    complete, i.e. when a block of the next page arrives.
+
+    Textract returns blocks page by page in order, so only the LINE texts
+    and word boxes of the current page are held. Pages without LINE blocks
+    yield nothing.
+    """
+    current = None
+    lines: List[str] = []
+    words = PageWords()
+    for block in blocks:
+        page = block.get("Page", 1)
+        if page != current:
+            if lines:
+                yield _page_text(lines, words)
+            current, lines, words = page, [], PageWords()
+        if block["BlockType"] == "LINE":
+            lines.append(block["Text"])
+        elif block["BlockType"] == "WORD":
+            words.add(block)
+    if lines:
+        yield _page_text(lines, words)
+
+
+def build_text(blocks: Iterable[dict]) -> str:
+    """
+    Build the document text from Textract blocks, page by page in order.
+
+    Pages laid out in columns, like receipts, become "item | qty | unit"
+    rows built from the WORD geometry; other pages are their LINE texts in
+    reading order. Each page is laid out and dropped before the next one is
+    read, so memory grows with the text rather than with the blocks or the
+    word boxes of the whole document.
+    """
+    return "\n".join(iter_page_texts(blocks))
+
+
+def collect_page_text(job_id: str) -> str:
+    """
+    Build the document text of a text detection job.
+    """
+
+    def iter_blocks():
+        for response in iter_result_pages(job_id):
+            if response["JobStatus"] != "SUCCEEDED":
+                raise RuntimeError(
+                    f"Text detection job {job_id} is {response['JobStatus']}"
+                )
+            yield from response.get("Blocks", ())
+
+    return build_text(iter_blocks())
+
+
+def detect_image_text(bucket: str, key: str) -> str:
+    """
+    Run synchronous text detection on an image and build its text.
+    """
+    response = textract_client.detect_document_text(
+        Document={"S3Object": {"Bucket": bucket, "Name": key}}
+    )
+    return build_text(response["Blocks"])
+
+
+@logger.inject_lambda_context(log_event=True)
+def handler(event, context):
+    """
+    Build the text of an uploaded document: from the results of a finished
+    StartDocumentTextDetection job for PDFs, so they don't run detection a
+    second time, or with DetectDocumentText for images. Only the text leaves
+    the function, never the Textract blocks.
+
+    Args:
+        event: {"bucket": ..., "key": ...} from the state machine, with the
+            "job_id" of the text detection job for PDFs.
+
+    Returns:
+        dict: The document text with its bucket and key, in the shape the SQS
+        step expects. Large texts are replaced by a "text_ref" S3 pointer.
+    """
+    if event.get("job_id"):
+        text = collect_page_text(event["job_id"])
+    else:
+        text = detect_image_text(event["bucket"], event["key"])
+    logger.info(f"Collected {len(text)} characters of text for {event['key']}")
+    return claim_check.offload(
+        {"text": text, "bucket": event["bucket"], "key": event["key"]}, "text"
+    )